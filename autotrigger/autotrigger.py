@@ -1,8 +1,63 @@
+import asyncio
+import csv
+import functools
+import io
+import json
+import logging
 import re
+import time
+from collections import OrderedDict
+
 import discord
 from redbot.core import commands, Config
 from redbot.core.utils.chat_formatting import box, pagify
-from typing import Dict, List, Optional, Pattern, Union
+from typing import Dict, Iterable, Iterator, List, Optional, Pattern, Tuple, Union
+
+from .cooldowns import TokenBucket
+from .matcher import BudgetExceeded, MatcherRegistry, TriggerMatch
+from .normalize import DEFAULT_NORMALIZATION, NORMALIZERS
+from .snapshot import GuildSnapshot, thaw
+from .stats import GuildStats, empty_histogram, histogram_percentile
+
+log = logging.getLogger("red.autotrigger")
+
+# How long a guild's resolved command prefixes are trusted before re-fetching them
+PREFIX_CACHE_TTL = 300
+# Default time in milliseconds a single message may spend in wildcard matching
+DEFAULT_MATCH_BUDGET = 5.0
+# Scopes a response cooldown can be keyed on
+COOLDOWN_SCOPES = ("trigger", "channel", "user")
+# Guilds whose compiled triggers are kept in memory before the least recently used is evicted
+MAX_LOADED_GUILDS = 1000
+# Largest trigger file accepted by the import command, in bytes
+MAX_IMPORT_SIZE = 5 * 1024 * 1024
+# Rows processed between yields to the event loop while importing
+IMPORT_CHUNK_SIZE = 200
+# Columns written and read by CSV import/export
+CSV_FIELDS = ("name", "pattern", "response", "channels", "roles", "priority")
+# Seconds between writes of the in-memory trigger statistics to Config
+STATS_FLUSH_INTERVAL = 300
+# Slowest trigger checks listed by the test command
+PROFILE_SHOWN = 10
+# Most responses a single message can set off in multi-match mode
+MAX_RESPONSES_LIMIT = 10
+# Longest message Discord accepts, combined responses are cut to fit
+MESSAGE_LIMIT = 2000
+# A channel mention or a bare channel ID
+CHANNEL_REFERENCE = re.compile(r"<#[0-9]{15,20}>|[0-9]{15,20}")
+
+
+class ChannelReference(commands.TextChannelConverter):
+    """A text channel given as a mention or an ID.
+    
+    Channel names are refused, so an optional channel argument never
+    swallows the first word of the text after it.
+    """
+    
+    async def convert(self, ctx: commands.Context, argument: str) -> discord.TextChannel:
+        if not CHANNEL_REFERENCE.fullmatch(argument):
+            raise commands.BadArgument(f"`{argument}` is not a channel mention or ID.")
+        return await super().convert(ctx, argument)
 
 
 class AutoTrigger(commands.Cog):
@@ -18,27 +73,100 @@ class AutoTrigger(commands.Cog):
         
         default_guild = {
             "triggers": {},  # {trigger_name: {"pattern": str, "response": str, "wildcard": bool}}
-            "enabled": True
+            "enabled": True,
+            "match_budget": DEFAULT_MATCH_BUDGET,  # milliseconds per message
+            "normalization": DEFAULT_NORMALIZATION,  # one of NORMALIZERS
+            "max_responses": 1,  # triggers that may respond to one message
+            "slow_triggers": {},  # {trigger_name: {"count": int, "last_seen": int}}
+            "cooldowns": {},  # {scope: [rate, per_seconds]}
+            "stats": {"triggers": {}, "latency": []}  # {"triggers": {name: {"hits": int, "last_fired": int}}, "latency": [bucket counts]}
         }
         
         self.config.register_guild(**default_guild)
-        self.compiled_patterns = {}
-        self.cache = {}
+        self.snapshots: "OrderedDict[int, GuildSnapshot]" = OrderedDict()
+        self.matchers = MatcherRegistry()
+        self.loading: Dict[int, asyncio.Future] = {}
+        self.stats: Dict[int, GuildStats] = {}
+        self.stats_task: Optional[asyncio.Task] = None
+        self.cooldowns: Dict[int, Dict[str, TokenBucket]] = {}
+        self.prefix_cache: Dict[int, Tuple[float, Tuple[str, ...]]] = {}
         
     async def initialize(self):
-        """Load triggers from all guilds into cache when the cog loads."""
-        all_guilds = await self.config.all_guilds()
-        for guild_id, guild_data in all_guilds.items():
-            self.cache[guild_id] = guild_data
-            if "triggers" in guild_data:
-                self.compiled_patterns[guild_id] = {}
-                for name, trigger_data in guild_data["triggers"].items():
-                    pattern = trigger_data["pattern"]
-                    is_wildcard = trigger_data.get("wildcard", False)
-                    if is_wildcard:
-                        # Convert * wildcards to regex pattern
-                        regex_pattern = pattern.replace("*", ".*")
-                        self.compiled_patterns[guild_id][name] = re.compile(f"\\b{regex_pattern}\\b", re.IGNORECASE)
+        """Prepare the cog when it loads.
+        
+        Guild triggers are not loaded here: each guild is loaded and compiled
+        the first time it is needed, see `_get_snapshot`.
+        """
+        self.stats_task = asyncio.create_task(self._stats_flush_loop())
+    
+    async def _get_snapshot(self, guild: discord.Guild) -> GuildSnapshot:
+        """Return the guild's current snapshot, loading and compiling it on first use."""
+        snapshot = self.snapshots.get(guild.id)
+        if snapshot is not None:
+            self.snapshots.move_to_end(guild.id)
+            return snapshot
+        
+        # Share one load between everything that asks for the guild at the same time
+        future = self.loading.get(guild.id)
+        if future is None:
+            future = self.loading[guild.id] = asyncio.ensure_future(self._load_guild(guild))
+            future.add_done_callback(lambda _: self.loading.pop(guild.id, None))
+        return await asyncio.shield(future)
+    
+    async def _load_guild(self, guild: discord.Guild) -> GuildSnapshot:
+        """Load a guild's settings from Config and compile them into a snapshot."""
+        data = await self.config.guild(guild).all()
+        # Compiling a large trigger set takes a while, keep it off the event loop
+        snapshot = await asyncio.get_running_loop().run_in_executor(
+            None, GuildSnapshot.from_config, data, self.matchers
+        )
+        
+        self.snapshots[guild.id] = snapshot
+        self._rebuild_cooldowns(guild.id)
+        
+        while len(self.snapshots) > MAX_LOADED_GUILDS:
+            self._evict_guild(next(iter(self.snapshots)))
+        return snapshot
+    
+    def _evict_guild(self, guild_id: int):
+        """Drop a guild's in-memory state. Config remains the source of truth."""
+        snapshot = self.snapshots.pop(guild_id, None)
+        if snapshot is not None:
+            snapshot.release()
+        self.cooldowns.pop(guild_id, None)
+        self.prefix_cache.pop(guild_id, None)
+    
+    async def _update_snapshot(self, guild_id: int, **changes):
+        """Swap in a new snapshot of the guild with some Config values replaced.
+        
+        Changes that recompile the matchers (triggers or normalization) are
+        compiled in an executor. If another edit swaps the snapshot meanwhile,
+        the work is redone on top of it with the changed values now in Config.
+        """
+        current = self.snapshots.get(guild_id)
+        if current is None:
+            # Evicted while a command was running, it is reloaded from Config on next use
+            return
+        if "triggers" not in changes and "normalization" not in changes:
+            updated = self.snapshots[guild_id] = current.evolve(**changes)
+            if updated.channel_matchers is not current.channel_matchers:
+                current.release()
+            return
+        
+        loop = asyncio.get_running_loop()
+        while True:
+            updated = await loop.run_in_executor(None, functools.partial(current.evolve, **changes))
+            if self.snapshots.get(guild_id) is current:
+                break
+            updated.release()
+            guild_config = self.config.guild_from_id(guild_id)
+            changes = {key: await guild_config.get_attr(key)() for key in changes}
+            current = self.snapshots.get(guild_id)
+            if current is None:
+                return
+        
+        self.snapshots[guild_id] = updated
+        current.release()
     
     @commands.group(name="autotrigger", aliases=["at"])
     @commands.guild_only()
@@ -55,6 +183,10 @@ class AutoTrigger(commands.Cog):
         
         Use * as a wildcard to match any characters.
         
+        Responses can use these placeholders:
+        `{author}`, `{author.name}`, `{channel}`, `{guild}`,
+        `{count}` (times the trigger has fired) and `{match}` (the matched text).
+        
         Example:
         [p]autotrigger add hello hello* :: Hello there, {author}!
         """
@@ -68,7 +200,8 @@ class AutoTrigger(commands.Cog):
         if not pattern or not response:
             return await ctx.send("Pattern and response cannot be empty.")
         
-        guild_id = ctx.guild.id
+        # Make sure a load started before this write cannot overwrite it
+        await self._get_snapshot(ctx.guild)
         is_wildcard = "*" in pattern
         
         async with self.config.guild(ctx.guild).triggers() as triggers:
@@ -78,24 +211,7 @@ class AutoTrigger(commands.Cog):
                 "wildcard": is_wildcard
             }
         
-        # Update cache and compile pattern
-        if guild_id not in self.cache:
-            self.cache[guild_id] = {"triggers": {}, "enabled": True}
-        if "triggers" not in self.cache[guild_id]:
-            self.cache[guild_id]["triggers"] = {}
-        
-        self.cache[guild_id]["triggers"][name] = {
-            "pattern": pattern,
-            "response": response,
-            "wildcard": is_wildcard
-        }
-        
-        if guild_id not in self.compiled_patterns:
-            self.compiled_patterns[guild_id] = {}
-        
-        if is_wildcard:
-            regex_pattern = pattern.replace("*", ".*")
-            self.compiled_patterns[guild_id][name] = re.compile(f"\\b{regex_pattern}\\b", re.IGNORECASE)
+        await self._update_snapshot(ctx.guild.id, triggers=triggers)
         
         await ctx.send(f"Trigger `{name}` has been added successfully.")
     
@@ -103,6 +219,7 @@ class AutoTrigger(commands.Cog):
     async def remove_trigger(self, ctx, name: str):
         """Remove a trigger by name."""
         guild_id = ctx.guild.id
+        await self._get_snapshot(ctx.guild)
         
         async with self.config.guild(ctx.guild).triggers() as triggers:
             if name not in triggers:
@@ -110,33 +227,26 @@ class AutoTrigger(commands.Cog):
             
             del triggers[name]
         
-        # Update cache
-        if guild_id in self.cache and "triggers" in self.cache[guild_id]:
-            if name in self.cache[guild_id]["triggers"]:
-                del self.cache[guild_id]["triggers"][name]
-        
-        # Update compiled patterns
-        if guild_id in self.compiled_patterns and name in self.compiled_patterns[guild_id]:
-            del self.compiled_patterns[guild_id][name]
+        await self._update_snapshot(guild_id, triggers=triggers)
+        await self._forget_stats(guild_id, [name])
         
         await ctx.send(f"Trigger `{name}` has been removed.")
     
     @auto_trigger.command(name="list")
     async def list_triggers(self, ctx):
         """List all triggers for this guild."""
-        guild_id = ctx.guild.id
+        triggers = (await self._get_snapshot(ctx.guild)).triggers
         
-        if guild_id not in self.cache or "triggers" not in self.cache[guild_id] or not self.cache[guild_id]["triggers"]:
+        if not triggers:
             return await ctx.send("No triggers have been set up in this server.")
         
-        triggers = self.cache[guild_id]["triggers"]
-        
         message = "**Configured Triggers:**\n\n"
         for name, data in triggers.items():
             wildcard_info = " (with wildcards)" if data.get("wildcard", False) else ""
             message += f"• **{name}**{wildcard_info}\n"
             message += f"  Pattern: `{data['pattern']}`\n"
-            message += f"  Response: `{data['response']}`\n\n"
+            message += f"  Response: `{data['response']}`\n"
+            message += f"  Scope: {self._describe_scope(data)}\n\n"
         
         for page in pagify(message, delims=["\n\n"]):
             await ctx.send(page)
@@ -144,16 +254,11 @@ class AutoTrigger(commands.Cog):
     @auto_trigger.command(name="toggle")
     async def toggle_triggers(self, ctx):
         """Toggle auto triggers on or off for this guild."""
-        guild_id = ctx.guild.id
-        
-        if guild_id not in self.cache:
-            self.cache[guild_id] = {"triggers": {}, "enabled": True}
-        
-        current_status = self.cache[guild_id].get("enabled", True)
-        new_status = not current_status
+        snapshot = await self._get_snapshot(ctx.guild)
+        new_status = not snapshot.enabled
         
         await self.config.guild(ctx.guild).enabled.set(new_status)
-        self.cache[guild_id]["enabled"] = new_status
+        await self._update_snapshot(ctx.guild.id, enabled=new_status)
         
         status_message = "enabled" if new_status else "disabled"
         await ctx.send(f"Auto triggers have been {status_message} for this server.")
@@ -161,13 +266,11 @@ class AutoTrigger(commands.Cog):
     @auto_trigger.command(name="show")
     async def show_trigger(self, ctx, name: str):
         """Show details for a specific trigger."""
-        guild_id = ctx.guild.id
+        triggers = (await self._get_snapshot(ctx.guild)).triggers
         
-        if guild_id not in self.cache or "triggers" not in self.cache[guild_id]:
+        if not triggers:
             return await ctx.send("No triggers have been set up in this server.")
         
-        triggers = self.cache[guild_id]["triggers"]
-        
         if name not in triggers:
             return await ctx.send(f"Trigger `{name}` not found.")
         
@@ -177,7 +280,9 @@ class AutoTrigger(commands.Cog):
         message = f"**Trigger: {name}**\n"
         message += f"Pattern: `{data['pattern']}`\n"
         message += f"Response: `{data['response']}`\n"
-        message += f"Uses wildcards: {wildcard_info}"
+        message += f"Uses wildcards: {wildcard_info}\n"
+        message += f"Priority: {data.get('priority', 0)}\n"
+        message += f"Scope: {self._describe_scope(data)}"
         
         await ctx.send(message)
     
@@ -190,13 +295,11 @@ class AutoTrigger(commands.Cog):
         Example:
         [p]autotrigger edit hello hello* :: Hello there, {author}!
         """
-        guild_id = ctx.guild.id
+        triggers = (await self._get_snapshot(ctx.guild)).triggers
         
-        if guild_id not in self.cache or "triggers" not in self.cache[guild_id]:
+        if not triggers:
             return await ctx.send("No triggers have been set up in this server.")
         
-        triggers = self.cache[guild_id]["triggers"]
-        
         if name not in triggers:
             return await ctx.send(f"Trigger `{name}` not found.")
         
@@ -213,29 +316,442 @@ class AutoTrigger(commands.Cog):
         is_wildcard = "*" in pattern
         
         async with self.config.guild(ctx.guild).triggers() as config_triggers:
+            # Keep settings such as scopes that the edit does not touch
             config_triggers[name] = {
+                **config_triggers.get(name, {}),
                 "pattern": pattern,
                 "response": response,
                 "wildcard": is_wildcard
             }
         
-        # Update cache
-        self.cache[guild_id]["triggers"][name] = {
-            "pattern": pattern,
-            "response": response,
-            "wildcard": is_wildcard
-        }
-        
-        # Update compiled patterns
-        if is_wildcard:
-            regex_pattern = pattern.replace("*", ".*")
-            self.compiled_patterns[guild_id][name] = re.compile(f"\\b{regex_pattern}\\b", re.IGNORECASE)
-        elif name in self.compiled_patterns.get(guild_id, {}):
-            # If it was a wildcard before but now it's not, remove from compiled patterns
-            del self.compiled_patterns[guild_id][name]
+        await self._update_snapshot(ctx.guild.id, triggers=config_triggers)
         
         await ctx.send(f"Trigger `{name}` has been updated successfully.")
     
+    @auto_trigger.command(name="scope")
+    async def set_scope(self, ctx, name: str, *targets: Union[discord.TextChannel, discord.Role]):
+        """Limit a trigger to some channels and/or roles.
+        
+        A trigger scoped to channels only fires in those channels, and one
+        scoped to roles only fires for members with at least one of them.
+        Give no channels or roles to make the trigger apply everywhere again.
+        
+        Example:
+        [p]autotrigger scope hello #general #memes @Members
+        """
+        await self._get_snapshot(ctx.guild)
+        channels = sorted({target.id for target in targets if isinstance(target, discord.TextChannel)})
+        roles = sorted({target.id for target in targets if isinstance(target, discord.Role)})
+        
+        async with self.config.guild(ctx.guild).triggers() as triggers:
+            if name not in triggers:
+                return await ctx.send(f"Trigger `{name}` not found.")
+            
+            trigger = triggers[name]
+            trigger.pop("channels", None)
+            trigger.pop("roles", None)
+            if channels:
+                trigger["channels"] = channels
+            if roles:
+                trigger["roles"] = roles
+        
+        await self._update_snapshot(ctx.guild.id, triggers=triggers)
+        await ctx.send(f"Trigger `{name}` now applies to: {self._describe_scope(trigger)}.")
+    
+    @auto_trigger.command(name="priority")
+    async def set_priority(self, ctx, name: str, priority: int = 0):
+        """Set which trigger wins when several match the same message.
+        
+        Higher priorities win. Triggers with the same priority are ranked by
+        where their match ends in the message. The default priority is 0.
+        
+        Example:
+        [p]autotrigger priority rules 10
+        """
+        await self._get_snapshot(ctx.guild)
+        
+        async with self.config.guild(ctx.guild).triggers() as triggers:
+            if name not in triggers:
+                return await ctx.send(f"Trigger `{name}` not found.")
+            
+            if priority:
+                triggers[name]["priority"] = priority
+            else:
+                triggers[name].pop("priority", None)
+        
+        await self._update_snapshot(ctx.guild.id, triggers=triggers)
+        await ctx.send(f"Trigger `{name}` now has priority {priority}.")
+    
+    @auto_trigger.command(name="multimatch")
+    async def set_max_responses(self, ctx, limit: Optional[int] = None):
+        """Show or set how many triggers may respond to one message.
+        
+        With a limit above 1, every matching trigger up to the limit responds,
+        highest priority first, combined into a single message.
+        Use 1 to only respond with the best match.
+        """
+        snapshot = await self._get_snapshot(ctx.guild)
+        
+        if limit is None:
+            return await ctx.send(f"Up to {snapshot.max_responses} trigger(s) respond to a message.")
+        
+        if not 1 <= limit <= MAX_RESPONSES_LIMIT:
+            return await ctx.send(f"The limit must be between 1 and {MAX_RESPONSES_LIMIT}.")
+        
+        await self.config.guild(ctx.guild).max_responses.set(limit)
+        await self._update_snapshot(ctx.guild.id, max_responses=limit)
+        await ctx.send(f"Up to {limit} trigger(s) will now respond to a message.")
+    
+    @staticmethod
+    def _describe_scope(data) -> str:
+        """Describe where a trigger applies."""
+        parts = []
+        if data.get("channels"):
+            parts.append(", ".join(f"<#{channel_id}>" for channel_id in data["channels"]))
+        if data.get("roles"):
+            parts.append("members with " + ", ".join(f"<@&{role_id}>" for role_id in data["roles"]))
+        return " for ".join(parts) if parts else "the whole server"
+    
+    @auto_trigger.command(name="export")
+    async def export_triggers(self, ctx, file_format: str = "json"):
+        """Export this server's triggers as a JSON or CSV file."""
+        file_format = file_format.lower()
+        if file_format not in ("json", "csv"):
+            return await ctx.send("Invalid format. Use `json` or `csv`.")
+        
+        triggers = (await self._get_snapshot(ctx.guild)).triggers
+        if not triggers:
+            return await ctx.send("No triggers have been set up in this server.")
+        
+        if file_format == "json":
+            content = json.dumps(thaw(triggers), indent=2, ensure_ascii=False)
+        else:
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(CSV_FIELDS)
+            for name, data in triggers.items():
+                writer.writerow((
+                    name,
+                    data["pattern"],
+                    data["response"],
+                    " ".join(str(channel_id) for channel_id in data.get("channels", ())),
+                    " ".join(str(role_id) for role_id in data.get("roles", ())),
+                    data.get("priority", 0)
+                ))
+            content = buffer.getvalue()
+        
+        file = discord.File(io.BytesIO(content.encode("utf-8")), filename=f"triggers.{file_format}")
+        await ctx.send(f"Exported {len(triggers)} trigger(s).", file=file)
+    
+    @auto_trigger.command(name="import")
+    async def import_triggers(self, ctx, replace: bool = False):
+        """Import triggers from an attached JSON or CSV file.
+        
+        JSON files use the format produced by `[p]autotrigger export`.
+        CSV files need `name`, `pattern` and `response` columns, and may
+        have `channels` and `roles` columns of space-separated IDs and a
+        `priority` column.
+        Existing triggers with the same name are overwritten. Pass `true`
+        to replace the whole trigger set instead.
+        """
+        if not ctx.message.attachments:
+            return await ctx.send("Please attach a JSON or CSV file.")
+        
+        attachment = ctx.message.attachments[0]
+        if attachment.size > MAX_IMPORT_SIZE:
+            return await ctx.send(f"The file is too large. The limit is {MAX_IMPORT_SIZE // (1024 * 1024)}MB.")
+        
+        try:
+            imported = await self._read_import(attachment)
+        except (ValueError, KeyError, TypeError, csv.Error) as e:
+            return await ctx.send(f"Could not import triggers: {e}")
+        
+        if not imported:
+            return await ctx.send("The file does not contain any triggers.")
+        
+        snapshot = await self._get_snapshot(ctx.guild)
+        triggers = {} if replace else thaw(snapshot.triggers)
+        triggers.update(imported)
+        
+        # One Config write and one matcher build for the whole set, compiled off the event loop
+        await self.config.guild(ctx.guild).triggers.set(triggers)
+        await self._update_snapshot(ctx.guild.id, triggers=triggers)
+        await self._forget_stats(ctx.guild.id, [name for name in snapshot.triggers if name not in triggers])
+        
+        await ctx.send(f"Imported {len(imported)} trigger(s). This server now has {len(triggers)} trigger(s).")
+    
+    async def _read_import(self, attachment: discord.Attachment) -> Dict[str, dict]:
+        """Parse an attached trigger file, yielding to the event loop between chunks."""
+        text = (await attachment.read()).decode("utf-8-sig")
+        
+        if attachment.filename.lower().endswith(".csv"):
+            rows = csv.DictReader(io.StringIO(text))
+        else:
+            loaded = await asyncio.get_running_loop().run_in_executor(None, json.loads, text)
+            if not isinstance(loaded, dict):
+                raise ValueError("the JSON file must map trigger names to triggers.")
+            rows = ({"name": name, **data} for name, data in loaded.items())
+        
+        triggers = {}
+        for index, row in enumerate(rows, 1):
+            if not index % IMPORT_CHUNK_SIZE:
+                await asyncio.sleep(0)
+            
+            name = str(row.get("name") or "").strip()
+            pattern = str(row.get("pattern") or "").strip()
+            response = str(row.get("response") or "").strip()
+            if not name or not pattern or not response:
+                raise ValueError(f"entry {index} needs a name, pattern and response.")
+            
+            trigger = {
+                "pattern": pattern,
+                "response": response,
+                "wildcard": "*" in pattern
+            }
+            for scope in ("channels", "roles"):
+                ids = self._parse_ids(row.get(scope))
+                if ids:
+                    trigger[scope] = ids
+            priority = int(row.get("priority") or 0)
+            if priority:
+                trigger["priority"] = priority
+            triggers[name] = trigger
+        return triggers
+    
+    @staticmethod
+    def _parse_ids(value) -> List[int]:
+        """Read a list of IDs from a JSON list or a space-separated CSV cell."""
+        if not value:
+            return []
+        if isinstance(value, str):
+            value = value.split()
+        return sorted({int(item) for item in value})
+    
+    @auto_trigger.command(name="stats")
+    async def show_stats(self, ctx):
+        """Show how often triggers fire and how long matching takes."""
+        snapshot = await self._get_snapshot(ctx.guild)
+        triggers = snapshot.triggers
+        
+        if not triggers:
+            return await ctx.send("No triggers have been set up in this server.")
+        
+        stored = snapshot.stats
+        pending = self.stats.get(ctx.guild.id, GuildStats())
+        latency = stored.get("latency") or empty_histogram()
+        latency = [old + new for old, new in zip(latency, pending.latency)]
+        
+        rows = []
+        for name in triggers:
+            entry = stored["triggers"].get(name, {})
+            hits = entry.get("hits", 0) + pending.hits.get(name, 0)
+            last_fired = pending.last_fired.get(name) or entry.get("last_fired")
+            rows.append((hits, name, last_fired))
+        rows.sort(key=lambda row: row[0], reverse=True)
+        
+        def describe(value: Optional[int]) -> str:
+            if value is None:
+                return "n/a"
+            return "over 10ms" if value < 0 else f"≤ {value}µs"
+        
+        message = "**Matching latency:**\n"
+        message += f"Messages matched: {sum(latency)}\n"
+        message += f"p50: {describe(histogram_percentile(latency, 0.5))}, "
+        message += f"p99: {describe(histogram_percentile(latency, 0.99))}\n\n"
+        message += "**Trigger hits:**\n"
+        for hits, name, last_fired in rows:
+            last = f"last <t:{last_fired}:R>" if last_fired else "never fired"
+            message += f"• **{name}**: {hits} hit(s), {last}\n"
+        
+        for page in pagify(message):
+            await ctx.send(page)
+    
+    @auto_trigger.command(name="budget")
+    async def set_budget(self, ctx, milliseconds: Optional[float] = None):
+        """Show or set the time a message may spend in wildcard matching.
+        
+        Messages that run over the budget are skipped and the wildcard triggers
+        involved are recorded. See them with `[p]autotrigger slow`.
+        """
+        snapshot = await self._get_snapshot(ctx.guild)
+        
+        if milliseconds is None:
+            return await ctx.send(f"The matching budget is {snapshot.match_budget:g}ms per message.")
+        
+        if milliseconds <= 0:
+            return await ctx.send("The budget must be greater than 0.")
+        
+        await self.config.guild(ctx.guild).match_budget.set(milliseconds)
+        await self._update_snapshot(ctx.guild.id, match_budget=milliseconds)
+        await ctx.send(f"The matching budget has been set to {milliseconds:g}ms per message.")
+    
+    @auto_trigger.command(name="normalize")
+    async def set_normalization(self, ctx, mode: Optional[str] = None):
+        """Show or set how messages and patterns are normalized before matching.
+        
+        Modes:
+        `basic` - lowercase only (default)
+        `unicode` - also fold full-width and compatibility characters and use full case folding
+        `confusables` - also ignore accents and treat look-alike letters from other alphabets as Latin
+        """
+        snapshot = await self._get_snapshot(ctx.guild)
+        
+        if mode is None:
+            return await ctx.send(f"Normalization mode: `{snapshot.normalization}`.")
+        
+        mode = mode.lower()
+        if mode not in NORMALIZERS:
+            return await ctx.send(f"Invalid mode. Use one of: {', '.join(NORMALIZERS)}.")
+        
+        await self.config.guild(ctx.guild).normalization.set(mode)
+        await self._update_snapshot(ctx.guild.id, normalization=mode)
+        await ctx.send(f"Normalization mode set to `{mode}`.")
+    
+    @auto_trigger.command(name="cooldown")
+    async def set_cooldown(self, ctx, scope: Optional[str] = None, rate: int = 0, seconds: float = 0):
+        """Show or set response cooldowns.
+        
+        Scopes are `trigger`, `channel` and `user`: each allows `rate` responses
+        per `seconds` for every trigger, channel or user respectively.
+        Use a rate of 0 to remove a cooldown.
+        
+        Example:
+        [p]autotrigger cooldown channel 3 60
+        """
+        guild_id = ctx.guild.id
+        snapshot = await self._get_snapshot(ctx.guild)
+        
+        if scope is None:
+            cooldowns = snapshot.cooldowns
+            if not cooldowns:
+                return await ctx.send("No cooldowns are set up in this server.")
+            message = "**Response cooldowns:**\n"
+            for name, (scope_rate, per) in cooldowns.items():
+                message += f"• Per {name}: {scope_rate} response(s) every {per:g}s\n"
+            return await ctx.send(message)
+        
+        scope = scope.lower()
+        if scope not in COOLDOWN_SCOPES:
+            return await ctx.send(f"Invalid scope. Use one of: {', '.join(COOLDOWN_SCOPES)}.")
+        
+        async with self.config.guild(ctx.guild).cooldowns() as cooldowns:
+            if rate <= 0:
+                cooldowns.pop(scope, None)
+            else:
+                if seconds <= 0:
+                    return await ctx.send("The cooldown period must be greater than 0.")
+                cooldowns[scope] = [rate, seconds]
+        
+        await self._update_snapshot(guild_id, cooldowns=cooldowns)
+        self._rebuild_cooldowns(guild_id)
+        
+        if rate <= 0:
+            await ctx.send(f"The per-{scope} cooldown has been removed.")
+        else:
+            await ctx.send(f"Per-{scope} cooldown set to {rate} response(s) every {seconds:g}s.")
+    
+    @auto_trigger.command(name="slow")
+    async def slow_triggers(self, ctx, reset: bool = False):
+        """List triggers that made messages exceed the matching budget.
+        
+        Use `[p]autotrigger slow true` to clear the list.
+        """
+        snapshot = await self._get_snapshot(ctx.guild)
+        
+        if reset:
+            await self.config.guild(ctx.guild).slow_triggers.clear()
+            await self._update_snapshot(ctx.guild.id, slow_triggers={})
+            pending = self.stats.get(ctx.guild.id)
+            if pending is not None:
+                pending.slow.clear()
+                pending.slow_last_seen.clear()
+            return await ctx.send("The slow trigger list has been cleared.")
+        
+        slow = self.stats.get(ctx.guild.id, GuildStats()).pending_slow(snapshot.slow_triggers)
+        if not slow:
+            return await ctx.send("No trigger has exceeded the matching budget.")
+        
+        message = "**Triggers over the matching budget:**\n\n"
+        for name, entry in sorted(slow.items(), key=lambda item: item[1]["count"], reverse=True):
+            message += f"• **{name}**: {entry['count']} time(s), last <t:{entry['last_seen']}:R>\n"
+        
+        for page in pagify(message):
+            await ctx.send(page)
+    
+    @auto_trigger.command(name="test")
+    async def test_triggers(self, ctx, channel: Optional[ChannelReference] = None, *, text: str):
+        """Run text through the triggers without sending any response.
+        
+        Lists every trigger that matches in the order they would be considered,
+        which ones would respond to you, and how long each trigger takes to
+        check on its own so slow patterns stand out. Cooldowns are ignored.
+        Give a channel as a mention or an ID to test in another channel.
+        
+        Example:
+        [p]autotrigger test #general hello there everyone
+        """
+        snapshot = await self._get_snapshot(ctx.guild)
+        channel = channel or ctx.channel
+        matcher = snapshot.matcher_for(channel.id)
+        if not matcher:
+            return await ctx.send(f"No triggers apply in {channel.mention}.")
+        
+        content = matcher.normalize(text)
+        budget = snapshot.match_budget / 1000
+        started = time.perf_counter()
+        try:
+            matches = list(matcher.iter_matches(content, budget))
+            over_budget = None
+        except BudgetExceeded as e:
+            matches = list(matcher.iter_matches(content))
+            over_budget = e.triggers
+        elapsed = time.perf_counter() - started
+        matches = snapshot.rank(matches)
+        winners = self._select_matches(snapshot, iter(matches), ctx.author)[:snapshot.max_responses]
+        
+        # Checking every trigger separately is slow, keep it off the event loop
+        timings = await asyncio.get_running_loop().run_in_executor(None, matcher.profile, content)
+        timings.sort(key=lambda timing: timing.seconds, reverse=True)
+        total = sum(timing.seconds for timing in timings) or 1
+        
+        message = f"**Dry run in {channel.mention}**\n"
+        if not snapshot.enabled:
+            message += "Triggers are currently disabled in this server.\n"
+        message += f"Full pass: {elapsed * 1_000_000:.0f}µs over {len(timings)} trigger(s), "
+        message += f"budget {snapshot.match_budget:g}ms\n"
+        if over_budget:
+            message += f"⚠ Over budget, the message would be skipped. Live wildcards: {', '.join(over_budget)}\n"
+        
+        message += "\n**Matches:**\n"
+        if not matches:
+            message += "None\n"
+        role_ids = {role.id for role in getattr(ctx.author, "roles", ())}
+        for position, match in enumerate(matches, 1):
+            source = text if len(text) == len(content) else content
+            span = source[match.start:match.end].replace("`", "'")
+            kind = "wildcard" if snapshot.triggers[match.name].get("wildcard", False) else "exact"
+            priority = snapshot.priorities.get(match.name)
+            if priority:
+                kind += f", priority {priority}"
+            message += f"{position}. **{match.name}** ({kind}) `{span}`"
+            if match in winners and not over_budget:
+                message += " ← responds"
+            elif not snapshot.allows(match.name, role_ids):
+                message += " (not for your roles)"
+            message += "\n"
+        
+        message += "\n**Slowest checks:**\n"
+        for timing in timings[:PROFILE_SHOWN]:
+            kind = "wildcard" if timing.wildcard else "exact"
+            flag = " ⚠" if timing.seconds > budget else ""
+            message += (
+                f"• **{timing.name}** ({kind}): {timing.seconds * 1_000_000:.1f}µs, "
+                f"{timing.seconds / total:.0%} of the total{flag}\n"
+            )
+        
+        for page in pagify(message):
+            await ctx.send(page)
+    
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message):
         """Listen for messages and respond with triggers if appropriate."""
@@ -244,54 +760,236 @@ class AutoTrigger(commands.Cog):
             return
         
         guild_id = message.guild.id
+        snapshot = await self._get_snapshot(message.guild)
         
         # Check if triggers are enabled for this guild
-        if guild_id not in self.cache or self.cache[guild_id].get("enabled", True) is False:
+        if not snapshot.enabled:
             return
         
-        # Check if we have any triggers for this guild
-        if "triggers" not in self.cache[guild_id] or not self.cache[guild_id]["triggers"]:
+        # Check if any triggers apply in this channel
+        matcher = snapshot.matcher_for(message.channel.id)
+        if not matcher:
             return
         
-        content = message.content.lower()
-        ctx = await self.bot.get_context(message)
+        content = matcher.normalize(message.content)
+        budget = snapshot.match_budget / 1000
+        started = time.perf_counter()
+        try:
+            matches = self._select_matches(snapshot, matcher.iter_matches(content, budget), message.author)
+        except BudgetExceeded as e:
+            # Counted in memory and written with the other statistics, a long message must not cost a write
+            self._guild_stats(guild_id).record_slow(e.triggers, int(time.time()))
+            return
+        finally:
+            self._guild_stats(guild_id).record_latency(time.perf_counter() - started)
+        if not matches:
+            return
         
-        # Ignore command invocations
-        if ctx.valid:
+        # Only messages that hit a trigger and look like a command pay for context resolution
+        if await self._is_command(message):
             return
         
-        triggers = self.cache[guild_id]["triggers"]
+        fired = []
+        now = int(time.time())
+        for match in matches:
+            if len(fired) >= snapshot.max_responses:
+                break
+            if self._take_cooldown(message, match.name):
+                # Looked up again after the await, a flush may have swapped the pending batch out
+                self._guild_stats(guild_id).record_hit(match.name, now)
+                fired.append(match)
+        if fired:
+            await self._send_responses(message, snapshot, fired, content)
+    
+    def _first_allowed_match(
+        self, snapshot: GuildSnapshot, matches: Iterator[TriggerMatch], author: discord.abc.User
+    ) -> Optional[TriggerMatch]:
+        """Return the first match whose role scope includes the author."""
+        role_ids = None
+        for match in matches:
+            if match.name in snapshot.role_scopes:
+                if role_ids is None:
+                    role_ids = {role.id for role in getattr(author, "roles", ())}
+                if not snapshot.allows(match.name, role_ids):
+                    continue
+            return match
+        return None
+    
+    def _select_matches(
+        self, snapshot: GuildSnapshot, matches: Iterator[TriggerMatch], author: discord.abc.User
+    ) -> List[TriggerMatch]:
+        """Return the matches that may respond, best first.
         
-        for name, data in triggers.items():
-            pattern = data["pattern"].lower()
-            response = data["response"]
-            is_wildcard = data.get("wildcard", False)
+        Without priorities or multi-match the first allowed match wins and the
+        scan stops there. Otherwise the whole pass is collected and ranked.
+        """
+        if snapshot.max_responses == 1 and not snapshot.priorities:
+            match = self._first_allowed_match(snapshot, matches, author)
+            return [] if match is None else [match]
+        
+        role_ids = {role.id for role in getattr(author, "roles", ())} if snapshot.role_scopes else set()
+        return snapshot.rank(match for match in matches if snapshot.allows(match.name, role_ids))
+    
+    def _rebuild_cooldowns(self, guild_id: int):
+        """Create token buckets for the guild's configured cooldown scopes."""
+        snapshot = self.snapshots.get(guild_id)
+        cooldowns = snapshot.cooldowns if snapshot is not None else {}
+        if cooldowns:
+            self.cooldowns[guild_id] = {scope: TokenBucket(rate, per) for scope, (rate, per) in cooldowns.items()}
+        else:
+            self.cooldowns.pop(guild_id, None)
+    
+    def _take_cooldown(self, message: discord.Message, name: str) -> bool:
+        """Take a token from every cooldown that applies, unless one is exhausted."""
+        buckets = self.cooldowns.get(message.guild.id)
+        if not buckets:
+            return True
+        
+        keys = {"trigger": name, "channel": message.channel.id, "user": message.author.id}
+        now = time.monotonic()
+        if not all(bucket.ready(keys[scope], now) for scope, bucket in buckets.items()):
+            return False
+        for scope, bucket in buckets.items():
+            bucket.consume(keys[scope], now)
+        return True
+    
+    async def _stats_flush_loop(self):
+        """Periodically write the in-memory statistics to Config."""
+        while True:
+            await asyncio.sleep(STATS_FLUSH_INTERVAL)
+            try:
+                await self._flush_stats()
+            except Exception as e:
+                log.error(f"Error flushing trigger statistics: {e}")
+    
+    def _guild_stats(self, guild_id: int) -> GuildStats:
+        """Return the guild's pending statistics, starting a new batch after a flush."""
+        stats = self.stats.get(guild_id)
+        if stats is None:
+            stats = self.stats[guild_id] = GuildStats()
+        return stats
+    
+    async def _forget_stats(self, guild_id: int, names: Iterable[str]):
+        """Drop the stored and pending statistics of removed triggers.
+        
+        A trigger added later under the same name starts from zero.
+        """
+        names = set(names)
+        if not names:
+            return
+        pending = self.stats.get(guild_id)
+        if pending is not None:
+            for name in names:
+                pending.forget(name)
+        
+        guild_config = self.config.guild_from_id(guild_id)
+        async with guild_config.stats() as stored:
+            for name in names:
+                stored.get("triggers", {}).pop(name, None)
+        async with guild_config.slow_triggers() as slow_triggers:
+            for name in names:
+                slow_triggers.pop(name, None)
+        await self._update_snapshot(guild_id, stats=stored, slow_triggers=slow_triggers)
+    
+    async def _flush_stats(self):
+        """Add the pending statistics and slow triggers of every guild to Config.
+        
+        Guilds are taken out one at a time, so numbers recorded during a write
+        start a new batch and a failed write only puts that guild's batch back.
+        """
+        for guild_id in list(self.stats):
+            stats = self.stats.pop(guild_id, None)
+            if stats is None:
+                continue
+            snapshot = self.snapshots.get(guild_id)
+            if snapshot is not None:
+                # Numbers of triggers removed since they were recorded must not be stored again
+                for name in (stats.hits.keys() | stats.slow.keys()) - snapshot.triggers.keys():
+                    stats.forget(name)
+            guild_config = self.config.guild_from_id(guild_id)
+            written = False
+            try:
+                async with guild_config.stats() as stored:
+                    stats.merge_into(stored)
+                written = True
+                await self._update_snapshot(guild_id, stats=stored)
+                if stats.slow:
+                    async with guild_config.slow_triggers() as slow_triggers:
+                        stats.merge_slow_into(slow_triggers)
+                    await self._update_snapshot(guild_id, slow_triggers=slow_triggers)
+            except Exception as e:
+                log.error(f"Error flushing trigger statistics for guild {guild_id}: {e}")
+                if written:
+                    # The hits and latency are in Config already, only the slow triggers go back
+                    stats.hits.clear()
+                    stats.last_fired.clear()
+                    stats.latency = empty_histogram()
+                self._guild_stats(guild_id).absorb(stats)
+    
+    async def _get_prefixes(self, guild: discord.Guild) -> Tuple[str, ...]:
+        """Return the guild's command prefixes, cached for a short while."""
+        now = time.monotonic()
+        cached = self.prefix_cache.get(guild.id)
+        if cached is not None and now - cached[0] < PREFIX_CACHE_TTL:
+            return cached[1]
+        
+        prefixes = tuple(await self.bot.get_valid_prefixes(guild))
+        self.prefix_cache[guild.id] = (now, prefixes)
+        return prefixes
+    
+    async def _is_command(self, message: discord.Message) -> bool:
+        """Check whether a message is a valid command invocation."""
+        prefixes = await self._get_prefixes(message.guild)
+        if not message.content.startswith(prefixes):
+            return False
+        
+        ctx = await self.bot.get_context(message)
+        return ctx.valid
+    
+    async def _send_responses(
+        self, message: discord.Message, snapshot: GuildSnapshot, matches: List[TriggerMatch], content: str
+    ):
+        """Render the responses of the triggers that fired and send them as one message."""
+        # Prefer the original casing when normalizing did not shift any offsets
+        source = message.content if len(message.content) == len(content) else content
+        
+        responses = []
+        length = 0
+        for match in matches:
+            template = snapshot.templates[match.name]
             
-            if is_wildcard:
-                # Use regex pattern for wildcard matching
-                if name in self.compiled_patterns.get(guild_id, {}) and self.compiled_patterns[guild_id][name].search(content):
-                    await self._send_response(message, response)
-                    break
-            else:
-                # Exact matching
-                if f" {pattern} " in f" {content} " or content == pattern:
-                    await self._send_response(message, response)
-                    break
-    
-    async def _send_response(self, message: discord.Message, response: str):
-        """Format and send the trigger response."""
-        # Process placeholder replacements
-        formatted_response = response.replace("{author}", message.author.mention)
-        formatted_response = formatted_response.replace("{channel}", message.channel.mention)
-        formatted_response = formatted_response.replace("{guild}", message.guild.name)
-        
-        await message.channel.send(formatted_response)
+            count = 0
+            if template.uses("count"):
+                stored = snapshot.stats["triggers"].get(match.name, {})
+                pending = self.stats.get(message.guild.id)
+                count = stored.get("hits", 0) + (pending.hits.get(match.name, 0) if pending else 0)
+            
+            matched = source[match.start:match.end] if template.uses("match") else ""
+            response = template.render(message, matched, count)
+            
+            # Leave out responses that would push the message past Discord's limit
+            if responses and length + len(response) + 1 > MESSAGE_LIMIT:
+                break
+            responses.append(response)
+            length += len(response) + 1
+        
+        await message.channel.send("\n".join(responses))
 
     def cog_unload(self):
         """Clean up when cog is unloaded."""
+        if self.stats_task is not None:
+            self.stats_task.cancel()
+        # Keep the statistics gathered since the last flush
+        asyncio.create_task(self._flush_stats())
+        
         # Clear caches
-        self.cache.clear()
-        self.compiled_patterns.clear()
+        for future in self.loading.values():
+            future.cancel()
+        self.loading.clear()
+        self.snapshots.clear()
+        self.matchers.entries.clear()
+        self.cooldowns.clear()
+        self.prefix_cache.clear()
 
 
 async def setup(bot):
@@ -0,0 +1,232 @@
+"""Offline benchmark for AutoTrigger.on_message.
+
+Builds synthetic guilds with a mix of exact and wildcard triggers, replays a
+generated message corpus through the real cog using stand-in bot, guild,
+channel and message objects, and reports per-message latency, throughput
+and memory. Nothing connects to Discord.
+
+Run from the repository root:
+
+    python -m autotrigger.benchmark
+    python -m autotrigger.benchmark --sizes 10 1000 --messages 5000 --json results.json
+"""
+
+import argparse
+import asyncio
+import copy
+import gc
+import json
+import random
+import statistics
+import time
+import tracemalloc
+from types import SimpleNamespace
+from typing import Dict, List
+from unittest import mock
+
+from redbot.core import Config
+
+from .autotrigger import AutoTrigger
+
+DEFAULT_SIZES = (10, 100, 1000, 10000)
+PREFIX = "!"
+# Messages replayed under tracemalloc to find the peak memory use
+TRACED_MESSAGES = 200
+
+
+class StubConfig:
+    """Answers the Config calls made while loading guilds, from in-memory data."""
+
+    def __init__(self):
+        self.defaults: dict = {}
+        self.guilds: Dict[int, dict] = {}
+
+    def register_guild(self, **defaults):
+        self.defaults = defaults
+
+    def guild(self, guild):
+        return StubGuildConfig(self, guild.id)
+
+
+class StubGuildConfig:
+    def __init__(self, config: StubConfig, guild_id: int):
+        self.config = config
+        self.guild_id = guild_id
+
+    async def all(self) -> dict:
+        data = copy.deepcopy(self.config.defaults)
+        data.update(copy.deepcopy(self.config.guilds.get(self.guild_id, {})))
+        return data
+
+
+class StubBot:
+    """The parts of Red that on_message touches."""
+
+    def __init__(self):
+        self.contexts = 0
+
+    async def get_valid_prefixes(self, guild):
+        return [PREFIX]
+
+    async def get_context(self, message):
+        self.contexts += 1
+        return SimpleNamespace(valid=message.content.startswith(PREFIX + "help"))
+
+
+class StubChannel:
+    def __init__(self, channel_id: int):
+        self.id = channel_id
+        self.mention = f"<#{channel_id}>"
+        self.sent = 0
+
+    async def send(self, content=None, **kwargs):
+        self.sent += 1
+
+
+def make_vocabulary(rng: random.Random, size: int) -> List[str]:
+    syllables = ["ka", "lo", "mi", "ne", "ru", "sa", "to", "vi", "ze", "po", "qu", "dra", "fen", "gul"]
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def make_triggers(rng: random.Random, vocabulary: List[str], count: int, wildcard_ratio: float) -> Dict[str, dict]:
+    """Generate a mix of single-word, phrase and wildcard triggers."""
+    triggers = {}
+    for index in range(count):
+        if rng.random() < wildcard_ratio:
+            shape = rng.randrange(3)
+            if shape == 0:
+                pattern = rng.choice(vocabulary)[:4] + "*"
+            elif shape == 1:
+                pattern = "*" + rng.choice(vocabulary)[-4:]
+            else:
+                pattern = f"{rng.choice(vocabulary)} * {rng.choice(vocabulary)}"
+        else:
+            pattern = " ".join(rng.choice(vocabulary) for _ in range(rng.randint(1, 3)))
+        triggers[f"trigger{index}"] = {
+            "pattern": pattern,
+            "response": "Hello {author.name}, you said {match}!" if index % 4 == 0 else "Noted.",
+            "wildcard": "*" in pattern
+        }
+    return triggers
+
+
+def make_corpus(rng: random.Random, vocabulary: List[str], count: int) -> List[str]:
+    """Generate chat-like messages: mostly short, some long, a few commands."""
+    filler = ["the", "a", "is", "and", "lol", "ok", "what", "why", "yes", "no", "this", "that", "to", "of"]
+    corpus = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.03:
+            corpus.append(PREFIX + rng.choice(["help", "ping", "info"]))
+            continue
+        length = rng.randint(80, 350) if roll > 0.95 else rng.randint(3, 25)
+        words = [rng.choice(vocabulary) if rng.random() < 0.05 else rng.choice(filler) for _ in range(length)]
+        corpus.append(" ".join(words))
+    return corpus
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def run_size(size: int, corpus_size: int, wildcard_ratio: float, seed: int) -> dict:
+    """Benchmark one synthetic guild with ``size`` triggers."""
+    rng = random.Random(seed + size)
+    vocabulary = make_vocabulary(rng, max(200, size // 2))
+    corpus = make_corpus(rng, vocabulary, corpus_size)
+
+    config = StubConfig()
+    bot = StubBot()
+    with mock.patch.object(Config, "get_conf", return_value=config):
+        cog = AutoTrigger(bot)
+
+    guild = SimpleNamespace(id=1000 + size, name=f"Guild {size}")
+    # A huge budget so the benchmark measures the matcher rather than the cut-off
+    config.guilds[guild.id] = {
+        "triggers": make_triggers(rng, vocabulary, size, wildcard_ratio),
+        "match_budget": 10 ** 9
+    }
+    channel = StubChannel(2000 + size)
+    author = SimpleNamespace(id=3000, bot=False, roles=[], mention="<@3000>", display_name="Bench")
+
+    messages = [SimpleNamespace(content=content, guild=guild, channel=channel, author=author) for content in corpus]
+
+    # Memory is traced in separate passes, tracemalloc would distort the timings
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    await cog._get_snapshot(guild)
+    compile_time = time.perf_counter() - started
+    compiled_memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    for message in messages[:TRACED_MESSAGES]:
+        await cog.on_message(message)
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    channel.sent = bot.contexts = 0
+
+    latencies = []
+    replay_started = time.perf_counter()
+    for message in messages:
+        started = time.perf_counter()
+        await cog.on_message(message)
+        latencies.append(time.perf_counter() - started)
+    replay_time = time.perf_counter() - replay_started
+
+    return {
+        "triggers": size,
+        "messages": len(messages),
+        "compile_ms": compile_time * 1000,
+        "p50_us": percentile(latencies, 0.5) * 1_000_000,
+        "p99_us": percentile(latencies, 0.99) * 1_000_000,
+        "mean_us": statistics.fmean(latencies) * 1_000_000,
+        "throughput": len(messages) / replay_time,
+        "responses": channel.sent,
+        "contexts": bot.contexts,
+        "compiled_kb": compiled_memory / 1024,
+        "peak_kb": peak_memory / 1024
+    }
+
+
+async def run(sizes: List[int], corpus_size: int, wildcard_ratio: float, seed: int) -> List[dict]:
+    return [await run_size(size, corpus_size, wildcard_ratio, seed) for size in sizes]
+
+
+def format_results(results: List[dict]) -> str:
+    header = (
+        f"{'triggers':>8} {'compile ms':>10} {'p50 µs':>9} {'p99 µs':>9} {'mean µs':>9} "
+        f"{'msg/s':>9} {'replies':>8} {'contexts':>8} {'compiled KB':>11} {'peak KB':>9}"
+    )
+    lines = [header, "-" * len(header)]
+    for result in results:
+        lines.append(
+            f"{result['triggers']:>8} {result['compile_ms']:>10.1f} {result['p50_us']:>9.1f} "
+            f"{result['p99_us']:>9.1f} {result['mean_us']:>9.1f} {result['throughput']:>9.0f} "
+            f"{result['responses']:>8} {result['contexts']:>8} {result['compiled_kb']:>11.0f} "
+            f"{result['peak_kb']:>9.0f}"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark AutoTrigger.on_message without Discord.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="trigger counts to test")
+    parser.add_argument("--messages", type=int, default=2000, help="messages replayed per guild")
+    parser.add_argument("--wildcards", type=float, default=0.3, help="share of wildcard triggers")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the synthetic data")
+    parser.add_argument("--json", dest="json_path", help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.sizes, args.messages, args.wildcards, args.seed))
+    print(format_results(results))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import time
+from typing import Dict, Hashable, Optional, Tuple
+
+# Sweep idle buckets after this many checks
+SWEEP_INTERVAL = 1024
+
+
+class TokenBucket:
+    """Token buckets for many keys sharing one rate, stored as (tokens, updated) pairs.
+
+    A bucket that has been idle long enough to refill completely carries no
+    information, so it is dropped instead of kept around.
+    """
+
+    __slots__ = ("rate", "per", "buckets", "checks")
+
+    def __init__(self, rate: int, per: float):
+        self.rate = rate
+        self.per = per
+        self.buckets: Dict[Hashable, Tuple[float, float]] = {}
+        self.checks = 0
+
+    def _refill(self, key: Hashable, now: float) -> float:
+        entry = self.buckets.get(key)
+        if entry is None:
+            return float(self.rate)
+        tokens, updated = entry
+        return min(float(self.rate), tokens + (now - updated) * self.rate / self.per)
+
+    def ready(self, key: Hashable, now: Optional[float] = None) -> bool:
+        """Check whether a token is available for the key without taking it."""
+        if now is None:
+            now = time.monotonic()
+        return self._refill(key, now) >= 1
+
+    def consume(self, key: Hashable, now: Optional[float] = None):
+        """Take a token for the key."""
+        if now is None:
+            now = time.monotonic()
+        self.buckets[key] = (self._refill(key, now) - 1, now)
+
+        self.checks += 1
+        if self.checks >= SWEEP_INTERVAL:
+            self.checks = 0
+            self.sweep(now)
+
+    def sweep(self, now: Optional[float] = None):
+        """Drop buckets that have refilled completely."""
+        if now is None:
+            now = time.monotonic()
+        self.buckets = {
+            key: entry for key, entry in self.buckets.items()
+            if entry[0] + (now - entry[1]) * self.rate / self.per < self.rate
+        }
+
+    def __len__(self) -> int:
+        return len(self.buckets)
@@ -0,0 +1,400 @@
+import bisect
+import hashlib
+import heapq
+import json
+import re
+import threading
+import time
+from typing import Dict, Iterator, List, Mapping, NamedTuple, Optional, Tuple
+
+from .normalize import DEFAULT_NORMALIZATION, NORMALIZERS
+
+TOKEN_RE = re.compile(r"\S+")
+
+# How many characters the wildcard scan consumes between budget checks
+BUDGET_CHECK_INTERVAL = 256
+
+
+class BudgetExceeded(Exception):
+    """Raised when matching a message takes longer than the allowed budget."""
+
+    def __init__(self, triggers: List[str]):
+        super().__init__(f"Matching budget exceeded by: {', '.join(triggers)}")
+        self.triggers = triggers
+
+
+class TriggerMatch(NamedTuple):
+    """A trigger hit and the span of the content it matched."""
+
+    name: str
+    start: int
+    end: int
+
+
+class TriggerTiming(NamedTuple):
+    """How long checking one trigger on its own took, and what it matched."""
+
+    name: str
+    wildcard: bool
+    seconds: float
+    match: Optional[TriggerMatch]
+
+
+def is_word(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+def tokenize(content: str) -> List[Tuple[str, int, int]]:
+    """Split content into whitespace-delimited tokens with their spans."""
+    return [(found.group(), found.start(), found.end()) for found in TOKEN_RE.finditer(content)]
+
+
+class ExactIndex:
+    """Hash index of exact (non-wildcard) triggers keyed by their first token.
+
+    A message is tokenized once and every token costs a single dict lookup;
+    multi-word phrases are only compared when their first token appears.
+    """
+
+    def __init__(self):
+        self.index: Dict[str, List[Tuple[Tuple[str, ...], str]]] = {}
+
+    def add(self, name: str, pattern: str):
+        tokens = tuple(pattern.split())
+        if not tokens:
+            return
+        self.index.setdefault(tokens[0], []).append((tokens[1:], name))
+
+    def __bool__(self) -> bool:
+        return bool(self.index)
+
+    def iter_matches(self, tokens: List[Tuple[str, int, int]]) -> Iterator[Tuple[str, int, int]]:
+        """Yield (name, start, end) for every exact trigger found, in message order."""
+        index = self.index
+        count = len(tokens)
+        for position, (token, start, _) in enumerate(tokens):
+            candidates = index.get(token)
+            if candidates is None:
+                continue
+            for rest, name in candidates:
+                last = position + len(rest)
+                if last >= count:
+                    continue
+                if all(tokens[position + offset + 1][0] == word for offset, word in enumerate(rest)):
+                    yield name, start, tokens[last][2]
+
+
+class WildcardAutomaton:
+    """All wildcard triggers of a guild compiled into one bit-parallel NFA.
+
+    Each pattern is a sequence of literal characters and ``*`` gaps, wrapped
+    in word boundaries like the old ``\\b...\\b`` regexes. The states of every
+    pattern are packed side by side into a single integer and advanced with
+    a shift-and step per character, so the scan is linear in message length
+    and never backtracks. Literal characters are matched as-is, no regex
+    syntax is interpreted.
+    """
+
+    def __init__(self):
+        self.char_masks: Dict[str, int] = {}
+        self.star_mask = 0
+        self.start_mask = 0
+        self.final_mask = 0
+        # Bit positions gathered by `add`, turned into masks once by `compile`
+        self.char_bits: Dict[str, List[int]] = {}
+        self.star_bits: List[int] = []
+        self.spans: Dict[int, Tuple[int, str]] = {}
+        self.offsets: List[int] = []
+        self.items: Dict[str, List[str]] = {}
+        self.size = 0
+        self.compiled = True
+
+    def add(self, name: str, pattern: str):
+        items: List[str] = []
+        for char in pattern:
+            if char == "*" and items and items[-1] == "*":
+                continue
+            items.append(char)
+        if not items:
+            return
+        self.items[name] = items
+
+        offset = self.size
+        for index, item in enumerate(items):
+            if item == "*":
+                self.star_bits.append(offset + index)
+            else:
+                self.char_bits.setdefault(item, []).append(offset + index)
+
+        end = offset + len(items)
+        self.spans[end] = (offset, name)
+        self.offsets.append(offset)
+        self.size = end + 1
+        self.compiled = False
+
+    def compile(self):
+        """Build the masks from the collected bit positions.
+
+        Each mask is assembled once from a byte buffer, so compiling is
+        linear in the total pattern length however many patterns there are.
+        """
+        if self.compiled:
+            return
+        self.char_masks = {char: self._mask(bits) for char, bits in self.char_bits.items()}
+        self.star_mask = self._mask(self.star_bits)
+        self.start_mask = self._mask(self.offsets)
+        self.final_mask = self._mask(self.spans)
+        self.compiled = True
+
+    def _mask(self, bits) -> int:
+        buffer = bytearray(self.size // 8 + 1)
+        for bit in bits:
+            buffer[bit >> 3] |= 1 << (bit & 7)
+        return int.from_bytes(buffer, "little")
+
+    def __bool__(self) -> bool:
+        return bool(self.spans)
+
+    def iter_matches(self, content: str, deadline: Optional[float] = None) -> Iterator[Tuple[str, int]]:
+        """Yield (name, end) for each wildcard trigger, in the order they first complete.
+
+        Every pattern is reported once and then dropped from the scan. Raises
+        BudgetExceeded if the scan is still running past ``deadline``.
+        """
+        self.compile()
+        char_masks = self.char_masks
+        star = self.star_mask
+        start = self.start_mask
+        final = self.final_mask
+        length = len(content)
+
+        state = 0
+        previous_word = False
+        for position in range(length + 1):
+            if position < length:
+                char = content[position]
+                current_word = is_word(char)
+            else:
+                current_word = False
+
+            if current_word != previous_word:
+                state |= start
+                state |= (state & star) << 1
+                hit = state & final
+                while hit:
+                    bit = hit & -hit
+                    hit ^= bit
+                    end = bit.bit_length() - 1
+                    offset, name = self.spans[end]
+                    yield name, position
+                    # Each pattern only reports its first match
+                    alive = ~(((1 << (end + 1)) - 1) ^ ((1 << offset) - 1))
+                    state &= alive
+                    start &= alive
+                    final &= alive
+                if not start and not state:
+                    return
+
+            if position == length:
+                break
+            if deadline is not None and not position % BUDGET_CHECK_INTERVAL and time.perf_counter() > deadline:
+                raise BudgetExceeded(self._live(state))
+
+            state = ((state & char_masks.get(char, 0)) << 1) | (state & star)
+            state |= (state & star) << 1
+            previous_word = current_word
+
+    def find_start(self, name: str, content: str, end: int) -> int:
+        """Return the leftmost start of a match of ``name`` that ends at ``end``.
+
+        Runs the single pattern backwards from ``end``, so it stays linear
+        and is only paid for once a trigger has actually fired.
+        """
+        items = self.items[name][::-1]
+        masks: Dict[str, int] = {}
+        star = 0
+        for index, item in enumerate(items):
+            if item == "*":
+                star |= 1 << index
+            else:
+                masks[item] = masks.get(item, 0) | 1 << index
+        final = 1 << len(items)
+
+        best = end
+        state = 1 | (star & 1) << 1
+        for position in range(end, -1, -1):
+            if state & final:
+                before = position > 0 and is_word(content[position - 1])
+                after = position < len(content) and is_word(content[position])
+                if before != after:
+                    best = position
+            if position == 0:
+                break
+            state = ((state & masks.get(content[position - 1], 0)) << 1) | (state & star)
+            state |= (state & star) << 1
+            if not state:
+                break
+        return best
+
+    def _live(self, state: int) -> List[str]:
+        """Names of the patterns that were part-way through a match."""
+        live = {}
+        offsets = self.offsets
+        # Reading the set bits off the binary string keeps this linear in the automaton size
+        digits = bin(state)[:1:-1]
+        position = digits.find("1")
+        while position != -1 and position < self.size:
+            index = bisect.bisect_right(offsets, position) - 1
+            # States past a pattern's start one mean it is mid-match
+            if position > offsets[index]:
+                end = (offsets[index + 1] if index + 1 < len(offsets) else self.size) - 1
+                live[self.spans[end][1]] = None
+            position = digits.find("1", position + 1)
+        return list(live) or [name for _, name in self.spans.values()]
+
+
+class TriggerMatcher:
+    """A guild's whole trigger set compiled for single-pass matching.
+
+    Exact triggers live in a token hash index and wildcard triggers share
+    one linear-time automaton, so a message is scanned once no matter how
+    many triggers the guild has. Patterns are normalized here, once, and
+    content must go through `normalize` before it is matched.
+    """
+
+    def __init__(self, triggers: Mapping[str, Mapping], normalization: str = DEFAULT_NORMALIZATION):
+        self.key: Optional[str] = None
+        self.normalization = normalization
+        self.normalize = NORMALIZERS[normalization]
+        self.exact = ExactIndex()
+        self.wildcards = WildcardAutomaton()
+
+        for name, data in triggers.items():
+            if data.get("wildcard", False):
+                self.wildcards.add(name, self.normalize(data["pattern"]))
+            else:
+                self.exact.add(name, self.normalize(data["pattern"]))
+        self.wildcards.compile()
+
+    def __bool__(self) -> bool:
+        return bool(self.exact) or bool(self.wildcards)
+
+    def iter_matches(self, content: str, budget: Optional[float] = None) -> Iterator[TriggerMatch]:
+        """Yield every trigger found in the content, ordered by where its match ends.
+
+        Matches are produced lazily from one pass over the content, so
+        callers that stop at the first acceptable trigger do not scan the
+        rest. ``budget`` is the time in seconds the wildcard scan may take
+        before BudgetExceeded is raised.
+        """
+        exact: List[TriggerMatch] = []
+        if self.exact:
+            seen = set()
+            for name, start, end in self.exact.iter_matches(tokenize(content)):
+                if name not in seen:
+                    seen.add(name)
+                    exact.append(TriggerMatch(name, start, end))
+            exact.sort(key=lambda found: found.end)
+
+        if not self.wildcards:
+            yield from exact
+            return
+
+        deadline = None if budget is None else time.perf_counter() + budget
+        wildcards = (
+            TriggerMatch(name, self.wildcards.find_start(name, content, end), end)
+            for name, end in self.wildcards.iter_matches(content, deadline)
+        )
+        yield from heapq.merge(exact, wildcards, key=lambda found: found.end)
+
+    def match(self, content: str, budget: Optional[float] = None) -> Optional[TriggerMatch]:
+        """Return the trigger that completes first in the content, if any."""
+        return next(self.iter_matches(content, budget), None)
+
+    def profile(self, content: str) -> List[TriggerTiming]:
+        """Check every trigger against the content on its own and time each check.
+
+        Each trigger gets a single-entry index or automaton, so the timings
+        show what every pattern costs in isolation. This is far slower than
+        `iter_matches` and meant for diagnostics only.
+        """
+        timings = []
+        tokens = tokenize(content)
+        for first, candidates in self.exact.index.items():
+            for rest, name in candidates:
+                solo = ExactIndex()
+                solo.index[first] = [(rest, name)]
+                started = time.perf_counter()
+                found = next(solo.iter_matches(tokens), None)
+                seconds = time.perf_counter() - started
+                timings.append(TriggerTiming(name, False, seconds, found and TriggerMatch(*found)))
+
+        for name, items in self.wildcards.items.items():
+            solo = WildcardAutomaton()
+            solo.add(name, "".join(items))
+            started = time.perf_counter()
+            found = next(solo.iter_matches(content), None)
+            match = None
+            if found is not None:
+                match = TriggerMatch(name, solo.find_start(name, content, found[1]), found[1])
+            seconds = time.perf_counter() - started
+            timings.append(TriggerTiming(name, True, seconds, match))
+        return timings
+
+
+class MatcherRegistry:
+    """Compiled matchers shared by content across guilds.
+
+    Matchers are keyed by a hash of the normalization mode and the
+    normalized trigger set they were built from, so guilds that install
+    the same triggers share one compiled object. Each entry is reference
+    counted and dropped when the last guild using it releases it.
+    Snapshots may be built in an executor, so the bookkeeping is guarded
+    by a lock; compiling happens outside it.
+    """
+
+    def __init__(self):
+        self.entries: Dict[str, List] = {}  # {key: [matcher, references]}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key(triggers: Mapping[str, Mapping], normalization: str = DEFAULT_NORMALIZATION) -> str:
+        normalize = NORMALIZERS[normalization]
+        normalized = sorted(
+            (name, normalize(data["pattern"]), bool(data.get("wildcard", False)))
+            for name, data in triggers.items()
+        )
+        payload = json.dumps([normalization, normalized], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def acquire(
+        self, triggers: Mapping[str, Mapping], normalization: str = DEFAULT_NORMALIZATION
+    ) -> "TriggerMatcher":
+        """Return the shared matcher for a trigger set, compiling it if nobody holds it yet."""
+        key = self.key(triggers, normalization)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                entry[1] += 1
+                return entry[0]
+
+        matcher = TriggerMatcher(triggers, normalization)
+        matcher.key = key
+        with self.lock:
+            # Another thread may have compiled the same set meanwhile, keep the first one
+            entry = self.entries.setdefault(key, [matcher, 0])
+            entry[1] += 1
+            return entry[0]
+
+    def release(self, matcher: "TriggerMatcher"):
+        """Drop one reference to a matcher, forgetting it once unused."""
+        with self.lock:
+            entry = self.entries.get(matcher.key)
+            if entry is None or entry[0] is not matcher:
+                return
+            entry[1] -= 1
+            if entry[1] <= 0:
+                del self.entries[matcher.key]
+
+    def __len__(self) -> int:
+        return len(self.entries)
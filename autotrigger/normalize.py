@@ -0,0 +1,41 @@
+import unicodedata
+from typing import Callable, Dict
+
+# Look-alike characters from other scripts folded to the ASCII letter they imitate
+CONFUSABLES = str.maketrans({
+    # Cyrillic
+    "а": "a", "в": "b", "е": "e", "ё": "e", "к": "k", "м": "m", "н": "h", "о": "o", "р": "p",
+    "с": "c", "т": "t", "у": "y", "х": "x", "ѕ": "s", "і": "i", "ї": "i", "ј": "j", "һ": "h",
+    "ԁ": "d", "ԛ": "q", "ԝ": "w", "ӏ": "l",
+    # Greek
+    "α": "a", "β": "b", "ε": "e", "η": "n", "ι": "i", "κ": "k", "ν": "v", "ο": "o", "ρ": "p",
+    "τ": "t", "υ": "u", "χ": "x", "ω": "w",
+    # Latin look-alikes that NFKC leaves alone
+    "ı": "i", "ȷ": "j", "ł": "l", "ø": "o", "đ": "d", "ħ": "h", "ŀ": "l",
+})
+
+
+def _basic(text: str) -> str:
+    return text.lower()
+
+
+def _unicode(text: str) -> str:
+    return unicodedata.normalize("NFKC", text).casefold()
+
+
+def _confusables(text: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", text).casefold()
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return unicodedata.normalize("NFKC", stripped.translate(CONFUSABLES))
+
+
+# How message content and patterns are folded before matching.
+# `basic` lowercases, `unicode` also folds full-width and compatibility
+# forms (NFKC) and uses full case folding, `confusables` additionally
+# strips accents and maps look-alike letters from other scripts.
+NORMALIZERS: Dict[str, Callable[[str], str]] = {
+    "basic": _basic,
+    "unicode": _unicode,
+    "confusables": _confusables,
+}
+DEFAULT_NORMALIZATION = "basic"
@@ -0,0 +1,150 @@
+from dataclasses import dataclass, field, replace
+from types import MappingProxyType
+from typing import AbstractSet, Any, Dict, Iterable, List, Mapping, Optional
+
+from .matcher import MatcherRegistry, TriggerMatch, TriggerMatcher
+from .templates import ResponseTemplate
+
+
+def freeze(value: Any) -> Any:
+    """Return a read-only deep copy of Config data."""
+    if isinstance(value, Mapping):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """Return a plain mutable copy of frozen data, suitable for writing to Config."""
+    if isinstance(value, Mapping):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [thaw(item) for item in value]
+    return value
+
+
+def build_templates(
+    triggers: Mapping[str, Mapping[str, Any]],
+    previous: Optional["GuildSnapshot"] = None
+) -> Mapping[str, ResponseTemplate]:
+    """Parse the response of every trigger, reusing templates whose response did not change."""
+    templates = {}
+    for name, data in triggers.items():
+        if previous is not None and name in previous.triggers and previous.triggers[name]["response"] == data["response"]:
+            templates[name] = previous.templates[name]
+        else:
+            templates[name] = ResponseTemplate(data["response"])
+    return MappingProxyType(templates)
+
+
+def build_matchers(
+    triggers: Mapping[str, Mapping[str, Any]], registry: MatcherRegistry, normalization: str
+) -> Dict[str, Any]:
+    """Get the guild-wide matcher, one matcher per channel that has scoped triggers,
+    and the role scopes and priorities of the triggers that have them.
+
+    A channel matcher holds the guild-wide triggers plus the ones scoped to
+    that channel, so a message only ever runs through a single matcher.
+    Matchers come from the registry, so identical sets are compiled once.
+    """
+    guild_wide = {name: data for name, data in triggers.items() if not data.get("channels")}
+    by_channel: Dict[int, Dict[str, Mapping[str, Any]]] = {}
+    role_scopes = {}
+    priorities = {}
+    for name, data in triggers.items():
+        for channel_id in data.get("channels") or ():
+            by_channel.setdefault(channel_id, dict(guild_wide))[name] = data
+        if data.get("roles"):
+            role_scopes[name] = frozenset(data["roles"])
+        if data.get("priority"):
+            priorities[name] = data["priority"]
+
+    return {
+        "matcher": registry.acquire(guild_wide, normalization),
+        "channel_matchers": MappingProxyType({
+            channel_id: registry.acquire(scoped, normalization) for channel_id, scoped in by_channel.items()
+        }),
+        "role_scopes": MappingProxyType(role_scopes),
+        "priorities": MappingProxyType(priorities)
+    }
+
+
+@dataclass(frozen=True)
+class GuildSnapshot:
+    """A guild's settings, compiled matcher and response templates.
+
+    Snapshots are never modified. An edit builds a new snapshot with
+    `evolve` and swaps it in with a single assignment, so a message being
+    handled always sees one consistent version of the guild. Matchers are
+    borrowed from a shared registry and must be given back with `release`
+    once the snapshot is replaced by one with different triggers.
+    """
+
+    enabled: bool
+    match_budget: float
+    max_responses: int
+    normalization: str
+    triggers: Mapping[str, Mapping[str, Any]]
+    cooldowns: Mapping[str, Any]
+    slow_triggers: Mapping[str, Any]
+    stats: Mapping[str, Any]
+    matcher: TriggerMatcher
+    channel_matchers: Mapping[int, TriggerMatcher]
+    role_scopes: Mapping[str, AbstractSet[int]]
+    priorities: Mapping[str, int]
+    templates: Mapping[str, ResponseTemplate]
+    registry: MatcherRegistry = field(repr=False, compare=False)
+
+    @classmethod
+    def from_config(cls, data: dict, registry: MatcherRegistry) -> "GuildSnapshot":
+        triggers = freeze(data["triggers"])
+        return cls(
+            enabled=data["enabled"],
+            match_budget=data["match_budget"],
+            max_responses=data["max_responses"],
+            normalization=data["normalization"],
+            triggers=triggers,
+            cooldowns=freeze(data["cooldowns"]),
+            slow_triggers=freeze(data["slow_triggers"]),
+            stats=freeze(data["stats"]),
+            templates=build_templates(triggers),
+            registry=registry,
+            **build_matchers(triggers, registry, data["normalization"])
+        )
+
+    def evolve(self, **changes: Any) -> "GuildSnapshot":
+        """Return a copy with some Config values replaced, recompiling the triggers if they changed.
+
+        Changing the normalization mode recompiles the matchers as well.
+        """
+        frozen = {key: freeze(value) for key, value in changes.items()}
+        if "triggers" in frozen or "normalization" in frozen:
+            triggers = frozen.get("triggers", self.triggers)
+            frozen.update(build_matchers(triggers, self.registry, frozen.get("normalization", self.normalization)))
+        if "triggers" in frozen:
+            frozen["templates"] = build_templates(frozen["triggers"], self)
+        return replace(self, **frozen)
+
+    def release(self):
+        """Give this snapshot's matchers back to the registry."""
+        self.registry.release(self.matcher)
+        for matcher in self.channel_matchers.values():
+            self.registry.release(matcher)
+
+    def matcher_for(self, channel_id: int) -> TriggerMatcher:
+        """Return the matcher holding every trigger that applies in a channel."""
+        return self.channel_matchers.get(channel_id, self.matcher)
+
+    def allows(self, name: str, role_ids: AbstractSet[int]) -> bool:
+        """Check a trigger's role scope against the author's roles."""
+        roles = self.role_scopes.get(name)
+        return roles is None or not roles.isdisjoint(role_ids)
+
+    def rank(self, matches: Iterable[TriggerMatch]) -> List[TriggerMatch]:
+        """Order matches by priority, then by where they end in the message.
+
+        The sort is stable, so matches that tie keep the matcher's order.
+        """
+        priorities = self.priorities
+        return sorted(matches, key=lambda match: (-priorities.get(match.name, 0), match.end))
@@ -0,0 +1,95 @@
+import bisect
+from typing import Dict, List, Mapping, Optional
+
+# Upper bounds of the matching latency histogram buckets, in microseconds.
+# A final overflow bucket counts everything slower than the last bound.
+LATENCY_BUCKETS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+def empty_histogram() -> List[int]:
+    return [0] * (len(LATENCY_BUCKETS) + 1)
+
+
+def histogram_percentile(histogram: List[int], percentile: float) -> Optional[int]:
+    """Return the bucket bound (in microseconds) below which ``percentile`` of samples fall.
+
+    Returns None for an empty histogram and -1 if the percentile lands in
+    the overflow bucket.
+    """
+    total = sum(histogram)
+    if not total:
+        return None
+    threshold = total * percentile
+    seen = 0
+    for index, count in enumerate(histogram):
+        seen += count
+        if seen >= threshold:
+            return LATENCY_BUCKETS[index] if index < len(LATENCY_BUCKETS) else -1
+    return -1
+
+
+class GuildStats:
+    """Trigger hits, matching latency and slow triggers gathered since the last flush to Config."""
+
+    __slots__ = ("hits", "last_fired", "latency", "slow", "slow_last_seen")
+
+    def __init__(self):
+        self.hits: Dict[str, int] = {}
+        self.last_fired: Dict[str, int] = {}
+        self.latency = empty_histogram()
+        self.slow: Dict[str, int] = {}
+        self.slow_last_seen: Dict[str, int] = {}
+
+    def record_hit(self, name: str, now: int):
+        self.hits[name] = self.hits.get(name, 0) + 1
+        self.last_fired[name] = now
+
+    def record_latency(self, seconds: float):
+        self.latency[bisect.bisect_left(LATENCY_BUCKETS, seconds * 1_000_000)] += 1
+
+    def record_slow(self, names: List[str], now: int):
+        for name in names:
+            self.slow[name] = self.slow.get(name, 0) + 1
+            self.slow_last_seen[name] = now
+
+    def forget(self, name: str):
+        """Drop the pending numbers of a trigger that was removed."""
+        self.hits.pop(name, None)
+        self.last_fired.pop(name, None)
+        self.slow.pop(name, None)
+        self.slow_last_seen.pop(name, None)
+
+    def absorb(self, other: "GuildStats"):
+        """Add the numbers of another pending batch, such as one whose flush failed."""
+        for name, hits in other.hits.items():
+            self.hits[name] = self.hits.get(name, 0) + hits
+            self.last_fired[name] = max(self.last_fired.get(name, 0), other.last_fired[name])
+        self.latency = [old + new for old, new in zip(self.latency, other.latency)]
+        for name, count in other.slow.items():
+            self.slow[name] = self.slow.get(name, 0) + count
+            self.slow_last_seen[name] = max(self.slow_last_seen.get(name, 0), other.slow_last_seen[name])
+
+    def merge_into(self, stored: dict) -> dict:
+        """Add the pending numbers to stats stored in Config and return them."""
+        triggers = stored.setdefault("triggers", {})
+        for name, hits in self.hits.items():
+            entry = triggers.setdefault(name, {"hits": 0, "last_fired": None})
+            entry["hits"] += hits
+            entry["last_fired"] = self.last_fired[name]
+
+        latency = stored.get("latency") or empty_histogram()
+        stored["latency"] = [old + new for old, new in zip(latency, self.latency)]
+        return stored
+
+    def merge_slow_into(self, stored: dict) -> dict:
+        """Add the pending slow trigger counts to the list stored in Config and return it."""
+        for name, count in self.slow.items():
+            entry = stored.setdefault(name, {"count": 0, "last_seen": self.slow_last_seen[name]})
+            entry["count"] += count
+            entry["last_seen"] = self.slow_last_seen[name]
+        return stored
+
+    def pending_slow(self, stored: Mapping[str, Mapping]) -> Dict[str, dict]:
+        """Combine the slow triggers stored in Config with the ones not flushed yet."""
+        combined = {name: dict(entry) for name, entry in stored.items()}
+        return self.merge_slow_into(combined)
@@ -0,0 +1,55 @@
+import re
+from typing import Callable, Dict, List, Tuple
+
+import discord
+
+# Placeholder name -> resolver(message, matched_text, count)
+PLACEHOLDERS: Dict[str, Callable[[discord.Message, str, int], str]] = {
+    "author": lambda message, match, count: message.author.mention,
+    "author.name": lambda message, match, count: message.author.display_name,
+    "channel": lambda message, match, count: message.channel.mention,
+    "guild": lambda message, match, count: message.guild.name,
+    "count": lambda message, match, count: str(count),
+    "match": lambda message, match, count: match,
+}
+
+PLACEHOLDER_RE = re.compile(r"\{(" + "|".join(re.escape(name) for name in PLACEHOLDERS) + r")\}")
+
+
+class ResponseTemplate:
+    """A trigger response parsed once into literal and placeholder segments.
+
+    Rendering fills only the placeholders the response actually uses and
+    joins the segments once. Responses without placeholders are returned
+    as-is.
+    """
+
+    __slots__ = ("text", "parts", "slots", "placeholders")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.parts: List[str] = []
+        self.slots: List[Tuple[int, str]] = []
+
+        position = 0
+        for found in PLACEHOLDER_RE.finditer(text):
+            if found.start() > position:
+                self.parts.append(text[position:found.start()])
+            self.slots.append((len(self.parts), found.group(1)))
+            self.parts.append("")
+            position = found.end()
+        if position < len(text):
+            self.parts.append(text[position:])
+
+        self.placeholders = frozenset(name for _, name in self.slots)
+
+    def uses(self, placeholder: str) -> bool:
+        return placeholder in self.placeholders
+
+    def render(self, message: discord.Message, match: str = "", count: int = 0) -> str:
+        if not self.slots:
+            return self.text
+        parts = self.parts.copy()
+        for index, name in self.slots:
+            parts[index] = PLACEHOLDERS[name](message, match, count)
+        return "".join(parts)
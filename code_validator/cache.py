@@ -0,0 +1,74 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+# Rough per-entry overhead of the key, tuple and dicts, in bytes
+ENTRY_OVERHEAD = 256
+
+
+def normalize_code(code: str) -> str:
+    """Normalize line endings and trailing whitespace at the end of the snippet.
+
+    Nothing that could move a line or column number is touched, so cached
+    error messages stay accurate. Snippets are validated in this form, so
+    ones that only differ here really do get the same result.
+    """
+    return code.replace("\r\n", "\n").replace("\r", "\n").rstrip()
+
+
+def cache_key(language: str, version: str, code: str) -> Tuple[str, str, str]:
+    """Key of a snippet's result, for code already passed through `normalize_code`."""
+    digest = hashlib.sha256(code.encode("utf-8", "surrogatepass")).hexdigest()
+    return language, version, digest
+
+
+class ResultCache:
+    """LRU cache of validation results with a TTL and a memory cap.
+
+    Sizes are estimated from the stored error text; the least recently used
+    entries are evicted once the total goes over ``max_bytes``.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.entries: "OrderedDict[Tuple[str, str, str], Tuple[dict, float, int]]" = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple[str, str, str]) -> Optional[dict]:
+        entry = self.entries.get(key)
+        if entry is not None and entry[1] < time.monotonic():
+            self._drop(key)
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key: Tuple[str, str, str], result: dict):
+        if key in self.entries:
+            self._drop(key)
+        size = ENTRY_OVERHEAD + len(result.get("error", ""))
+        if size > self.max_bytes:
+            return
+        self.entries[key] = (result, time.monotonic() + self.ttl, size)
+        self.size += size
+        while self.size > self.max_bytes:
+            self._drop(next(iter(self.entries)))
+
+    def clear(self):
+        self.entries.clear()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _drop(self, key: Tuple[str, str, str]):
+        self.size -= self.entries.pop(key)[2]
+
+    def __len__(self) -> int:
+        return len(self.entries)
@@ -1,10 +1,54 @@
+import asyncio
+import contextlib
 import discord
 from redbot.core import commands
-import subprocess
 import tempfile
 import os
+import logging
 import re
-from typing import Optional
+import shutil
+import signal
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .cache import ResultCache, cache_key, normalize_code
+from .daemons import ValidatorDaemon
+from .detector import detect_language
+from .scheduler import QueueFull, ValidationScheduler
+from .toolchains import BUILTIN_TOOLCHAINS, Toolchain, probe_toolchains
+
+log = logging.getLogger("red.code_validator")
+
+# Largest Python snippet compiled in-process, in characters
+MAX_PYTHON_SIZE = 100_000
+# Validations that may run at the same time across the whole bot
+MAX_CONCURRENT_VALIDATIONS = 4
+# Lower caps for toolchains that start a JVM or are otherwise memory hungry
+LANGUAGE_LIMITS = {"java": 2, "kotlin": 1, "swift": 1, "c#": 1, "rust": 2, "typescript": 2}
+# Validations a single user may have waiting in the queue
+MAX_QUEUED_PER_USER = 2
+# Languages checked with a few regexes, cheap enough to skip the queue
+INLINE_LANGUAGES = {"html", "css", "sql"}
+# Wall-clock seconds a validation may take before it is killed
+DEFAULT_TIMEOUT = 10
+LANGUAGE_TIMEOUTS = {"java": 30, "kotlin": 60, "swift": 30, "c#": 30, "rust": 20, "typescript": 30, "go": 30}
+# Address space limit for validator processes, in bytes
+DEFAULT_MEMORY_LIMIT = 1024 ** 3
+# Runtimes that reserve large virtual address ranges up front and fail under RLIMIT_AS
+UNLIMITED_MEMORY_LANGUAGES = {"java", "kotlin", "javascript", "typescript", "swift", "go", "c#"}
+# Most bytes of compiler output kept for the error message
+MAX_OUTPUT = 64 * 1024
+# Characters of an error shown in the reply, which must fit in one Discord message
+MAX_ERROR_DISPLAY = 1800
+# Memory the result cache may use, in bytes, and how long a result stays valid, in seconds
+CACHE_MAX_BYTES = 4 * 1024 * 1024
+CACHE_TTL = 6 * 60 * 60
+# Snippets a warm helper process checks before it is replaced by a fresh one
+DAEMON_MAX_JOBS = 500
+# Scratch files for tools that cannot read stdin go to memory-backed storage where the host has it
+SCRATCH_PATH = "/dev/shm" if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK) else None
+# Helper programs run as warm validators
+HELPERS_PATH = Path(__file__).parent / "helpers"
 
 class CodeValidator(commands.Cog):
     """Validates code syntax for various programming languages."""
@@ -49,6 +93,15 @@ class CodeValidator(commands.Cog):
             "kotlin": self._validate_kotlin,
             "sql": self._validate_sql
         }
+        self.scheduler = ValidationScheduler(MAX_CONCURRENT_VALIDATIONS, LANGUAGE_LIMITS, MAX_QUEUED_PER_USER)
+        self.cache = ResultCache(CACHE_MAX_BYTES, CACHE_TTL)
+        self.toolchains: Optional[Dict[str, Toolchain]] = None
+        self.probe_task: Optional[asyncio.Task] = None
+        self.daemons: Dict[str, ValidatorDaemon] = {}
+
+    async def initialize(self):
+        """Probe the host's toolchains in the background when the cog loads."""
+        self.probe_task = asyncio.create_task(self._probe_toolchains())
 
     @commands.command()
     async def validate(self, ctx, *, code: str = None):
@@ -78,383 +131,405 @@ class CodeValidator(commands.Cog):
                         language = lang
                         break
         
+        # Validate the code in the same form its cache key is computed from
+        code = normalize_code(code)
+        
         # If we didn't get the language from a code block, try to detect it
         if not language:
-            language = self._detect_language(code)
+            detection = detect_language(code)
+            language = detection.language
+            # No language is also the answer when the best guesses are too close to call
+            if not language:
+                guesses = ", ".join(candidate for candidate, _ in detection.ranking[:3])
+                hint = f" It might be {guesses}." if guesses else ""
+                await ctx.send(
+                    f"Couldn't detect the programming language.{hint} Please specify using ```language\ncode\n```"
+                )
+                return
+        
+        if language not in self.language_validators:
+            await ctx.send(f"Sorry, validation for {language} is not supported yet.")
+            return
         
-        if not language:
-            await ctx.send("Couldn't detect the programming language. Please specify using ```language\ncode\n```")
+        # In-process checks need no probe, so they never wait for a slow toolchain to answer
+        toolchain = BUILTIN_TOOLCHAINS.get(language) or (await self._get_toolchains())[language]
+        if not toolchain.available:
+            await ctx.send(f"Sorry, {language} validation is unsupported on this host.")
             return
         
-        # Send initial response
-        response = await ctx.send(f"Validating {language} code...")
+        # Identical snippets checked by the same toolchain give the same answer
+        key = cache_key(language, toolchain.version, code)
+        result = self.cache.get(key)
+        response = None
+        if result is None:
+            response = await ctx.send(f"Validating {language} code...")
+            result = await self._run_validation(ctx, language, code, response)
+            if result is None:
+                return
+            # Timeouts and missing tools say nothing about the code itself
+            if not result.get("timed_out") and not result.get("unavailable"):
+                self.cache.put(key, result)
+        
+        if result.get("timed_out"):
+            content = f"⌛ **Timed out!** Validating your {language} code took too long."
+        elif result["valid"]:
+            content = f"✅ **Validated!** Your {language} code has no syntax errors."
+        else:
+            error = result["error"]
+            if len(error) > MAX_ERROR_DISPLAY:
+                error = error[:MAX_ERROR_DISPLAY] + "\n..."
+            content = f"❌ **Error in {language} code:**\n```\n{error}\n```"
         
-        # Validate the code
-        if language in self.language_validators:
-            result = await self.language_validators[language](code)
-            if result["valid"]:
-                await response.edit(content=f"✅ **Validated!** Your {language} code has no syntax errors.")
-            else:
-                error_msg = f"❌ **Error in {language} code:**\n```\n{result['error']}\n```"
-                await response.edit(content=error_msg)
+        if response is None:
+            await ctx.send(content)
         else:
-            await response.edit(content=f"Sorry, validation for {language} is not supported yet.")
-
-    def _detect_language(self, code: str) -> Optional[str]:
-        """Try to detect the programming language based on code patterns."""
-        # Simple heuristic-based detection
-        if "import " in code or "def " in code or "class " in code and ":" in code:
-            return "python"
-        elif "function" in code or "var " in code or "let " in code or "const " in code:
-            if "interface " in code or "type " in code or "<" in code and ">" in code:
-                return "typescript"
-            return "javascript"
-        elif "public class" in code or "private class" in code or "public static void main" in code:
-            return "java"
-        elif "#include" in code and ("int main" in code or "void main" in code):
-            if "cout" in code or "cin" in code or "::" in code:
-                return "c++"
-            return "c"
-        elif "using System;" in code or "namespace" in code and "{" in code:
-            return "c#"
-        elif "package " in code or "import " in code and "func " in code:
-            return "go"
-        elif "func " in code or "struct " in code and "impl " in code:
-            return "rust"
-        elif "<?php" in code or "namespace " in code and ";" in code:
-            return "php"
-        elif "require" in code or "def " in code and "end" in code:
-            return "ruby"
-        elif "<!DOCTYPE html>" in code or "<html>" in code:
-            return "html"
-        elif "{" in code and "}" in code and ":" in code and not "def " in code and not "function" in code:
-            return "css"
-        elif "#!/bin/bash" in code or "#!/bin/sh" in code:
-            return "bash"
-        elif "SELECT" in code.upper() and "FROM" in code.upper():
-            return "sql"
-        elif "import SwiftUI" in code or "class " in code and "init(" in code:
-            return "swift"
-        elif "fun " in code or "val " in code or "var " in code and "import kotlin" in code:
-            return "kotlin"
-        return None
+            await response.edit(content=content)
 
-    async def _validate_python(self, code: str) -> dict:
-        with tempfile.NamedTemporaryFile(suffix=".py", delete=False) as temp:
-            temp.write(code.encode())
-            temp_name = temp.name
+    @commands.group()
+    async def validator(self, ctx):
+        """Show the state of the code validator."""
+        pass
+
+    @validator.command(name="cache")
+    @commands.is_owner()
+    async def cache_stats(self, ctx, clear: bool = False):
+        """Show how well the validation result cache is doing.
         
-        try:
-            proc = subprocess.Popen(
-                ["python", "-m", "py_compile", temp_name],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            _, stderr = proc.communicate()
-            os.unlink(temp_name)
-            
-            if proc.returncode == 0:
-                return {"valid": True}
-            else:
-                return {"valid": False, "error": stderr}
-        except Exception as e:
-            try:
-                os.unlink(temp_name)
-            except:
-                pass
-            return {"valid": False, "error": str(e)}
+        Use `[p]validator cache true` to empty it.
+        """
+        if clear:
+            self.cache.clear()
+            return await ctx.send("The validation cache has been cleared.")
+        
+        lookups = self.cache.hits + self.cache.misses
+        hit_rate = f"{self.cache.hits / lookups:.0%}" if lookups else "n/a"
+        await ctx.send(
+            f"**Validation cache:**\n"
+            f"Entries: {len(self.cache)} ({self.cache.size / 1024:.0f} of {self.cache.max_bytes // 1024} KiB)\n"
+            f"Hits: {self.cache.hits}, misses: {self.cache.misses}, hit rate: {hit_rate}"
+        )
 
-    async def _validate_javascript(self, code: str) -> dict:
-        with tempfile.NamedTemporaryFile(suffix=".js", delete=False) as temp:
-            temp.write(code.encode())
-            temp_name = temp.name
+    @validator.command(name="toolchains")
+    async def toolchains_list(self, ctx, rescan: bool = False):
+        """Show which languages this host can validate and with what.
         
-        try:
-            proc = subprocess.Popen(
-                ["node", "--check", temp_name],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            _, stderr = proc.communicate()
-            os.unlink(temp_name)
-            
-            if proc.returncode == 0:
-                return {"valid": True}
+        Where each toolchain is installed is only shown to the bot owner.
+        The owner can use `[p]validator toolchains true` to look for
+        toolchains again after installing or upgrading one.
+        """
+        is_owner = await self.bot.is_owner(ctx.author)
+        if rescan:
+            if not is_owner:
+                return await ctx.send("Only the bot owner can rescan toolchains.")
+            async with ctx.typing():
+                self.probe_task = asyncio.create_task(self._probe_toolchains())
+                await asyncio.shield(self.probe_task)
+        
+        lines = []
+        for language, toolchain in sorted((await self._get_toolchains()).items()):
+            if toolchain.available and is_owner:
+                lines.append(f"✅ **{language}**: `{toolchain.path}` ({toolchain.version})")
+            elif toolchain.available:
+                lines.append(f"✅ **{language}**: {toolchain.version}")
             else:
-                return {"valid": False, "error": stderr}
-        except Exception as e:
+                lines.append(f"❌ **{language}**: not installed")
+        await ctx.send("**Validation toolchains:**\n" + "\n".join(lines))
+
+    async def _run_validation(self, ctx, language: str, code: str, response: discord.Message) -> Optional[dict]:
+        """Run a validator, through the queue unless it is a cheap regex check."""
+        validator = self.language_validators[language]
+        if language in INLINE_LANGUAGES:
+            return await validator(code)
+        
+        async def show_position(position: int):
             try:
-                os.unlink(temp_name)
-            except:
+                await response.edit(content=f"⏳ Waiting to validate {language} code (position {position} in queue)...")
+            except discord.HTTPException:
                 pass
-            return {"valid": False, "error": f"Could not validate JavaScript: {str(e)}"}
-
-    async def _validate_typescript(self, code: str) -> dict:
-        with tempfile.NamedTemporaryFile(suffix=".ts", delete=False) as temp:
-            temp.write(code.encode())
-            temp_name = temp.name
         
         try:
-            proc = subprocess.Popen(
-                ["tsc", "--noEmit", temp_name],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
+            return await self.scheduler.run(
+                ctx.guild.id if ctx.guild else 0,
+                ctx.author.id,
+                language,
+                lambda: validator(code),
+                show_position
             )
-            _, stderr = proc.communicate()
-            os.unlink(temp_name)
-            
-            if proc.returncode == 0:
-                return {"valid": True}
-            else:
-                return {"valid": False, "error": stderr}
-        except Exception as e:
-            try:
-                os.unlink(temp_name)
-            except:
-                pass
-            return {"valid": False, "error": f"Could not validate TypeScript: {str(e)}"}
+        except QueueFull:
+            await response.edit(content=f"You already have {MAX_QUEUED_PER_USER} validations waiting. Please wait for them to finish.")
+            return None
 
-    async def _validate_java(self, code: str) -> dict:
-        # Extract class name from code
-        class_pattern = r"public\s+class\s+(\w+)"
-        match = re.search(class_pattern, code)
-        class_name = match.group(1) if match else "Main"
+    async def _probe_toolchains(self):
+        """Find every toolchain and its version once, off the event loop, and start using them."""
+        loop = asyncio.get_running_loop()
+        toolchains = await loop.run_in_executor(None, probe_toolchains)
+        helpers = await loop.run_in_executor(None, self._helper_commands, toolchains)
+        
+        for daemon in self.daemons.values():
+            daemon.close()
+        self.daemons = {
+            language: ValidatorDaemon(language, command, DAEMON_MAX_JOBS) for language, command in helpers.items()
+        }
+        self.toolchains = toolchains
         
-        with tempfile.NamedTemporaryFile(suffix=f".java", delete=False) as temp:
-            temp.write(code.encode())
-            temp_name = temp.name
+        missing = [language for language, toolchain in toolchains.items() if not toolchain.available]
+        if missing:
+            log.info(f"No toolchain found for: {', '.join(missing)}")
+
+    async def _get_toolchains(self) -> Dict[str, Toolchain]:
+        """Return the capability table, waiting for the start-up probe if it is still running."""
+        if self.toolchains is None:
+            await asyncio.shield(self.probe_task)
+        return self.toolchains
+
+    @staticmethod
+    def _helper_commands(toolchains: Dict[str, Toolchain]) -> Dict[str, List[str]]:
+        """Commands of the warm helpers that can run on this host.
         
-        try:
-            proc = subprocess.Popen(
-                ["javac", temp_name],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            _, stderr = proc.communicate()
-            os.unlink(temp_name)
+        Helpers start on first use. Kotlin and Swift have no embeddable
+        compiler entry point that is practical to drive this way, so they
+        always use one-shot runs.
+        """
+        helpers = {}
+        node_helper = str(HELPERS_PATH / "node_validator.js")
+        node = toolchains["javascript"].path
+        if node is not None:
+            helpers["javascript"] = [node, node_helper, "javascript"]
             
-            if proc.returncode == 0:
-                return {"valid": True}
-            else:
-                return {"valid": False, "error": stderr}
-        except Exception as e:
-            try:
-                os.unlink(temp_name)
-            except:
-                pass
-            return {"valid": False, "error": f"Could not validate Java: {str(e)}"}
+            # The TypeScript helper loads the compiler package that ships the tsc on PATH
+            tsc = toolchains["typescript"].path
+            if tsc is not None:
+                package = Path(os.path.realpath(tsc)).parent.parent
+                if (package / "package.json").exists():
+                    helpers["typescript"] = [node, node_helper, "typescript", str(package)]
+        
+        # javac being present means a JDK, whose java can launch the helper from source
+        java = shutil.which("java")
+        if java is not None and toolchains["java"].available:
+            helpers["java"] = [java, "-XX:+UseSerialGC", str(HELPERS_PATH / "JavaValidator.java")]
+        return helpers
 
-    async def _validate_c(self, code: str) -> dict:
-        with tempfile.NamedTemporaryFile(suffix=".c", delete=False) as temp:
-            temp.write(code.encode())
-            temp_name = temp.name
-        
+    async def _run_daemon(self, language: str, code: str) -> Optional[dict]:
+        """Check code with the language's warm helper, or return None to fall back to a one-shot run."""
+        daemon = self.daemons.get(language)
+        if daemon is None:
+            return None
+        timeout = LANGUAGE_TIMEOUTS.get(language, DEFAULT_TIMEOUT)
         try:
-            proc = subprocess.Popen(
-                ["gcc", "-fsyntax-only", temp_name],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            _, stderr = proc.communicate()
-            os.unlink(temp_name)
-            
-            if proc.returncode == 0:
-                return {"valid": True}
-            else:
-                return {"valid": False, "error": stderr}
-        except Exception as e:
-            try:
-                os.unlink(temp_name)
-            except:
-                pass
-            return {"valid": False, "error": f"Could not validate C: {str(e)}"}
+            return await daemon.check(code, timeout)
+        except asyncio.TimeoutError:
+            return self._timed_out(timeout)
 
-    async def _validate_cpp(self, code: str) -> dict:
-        with tempfile.NamedTemporaryFile(suffix=".cpp", delete=False) as temp:
-            temp.write(code.encode())
-            temp_name = temp.name
+    async def _run_validator(
+        self, code: str, filename: Optional[str], command: List[str], language: str, use_stdout: bool = False
+    ) -> dict:
+        """Check code with an external tool without blocking the event loop.
+        
+        With no ``filename`` the code is piped to the tool's stdin. Otherwise
+        it is written under that name to a private scratch directory (on
+        tmpfs where available), the name is appended to ``command`` and the
+        tool runs inside the directory, which is removed afterwards along
+        with anything the tool wrote there. A zero exit status means the code
+        is valid, otherwise the tool's stderr (or stdout, for tools that
+        report there) is the error. The tool runs in its own session under
+        CPU and memory limits and the whole process group is killed if it
+        outlives the language's timeout.
+        """
+        key = language.lower()
+        timeout = LANGUAGE_TIMEOUTS.get(key, DEFAULT_TIMEOUT)
+        memory = None if key in UNLIMITED_MEMORY_LANGUAGES else DEFAULT_MEMORY_LIMIT
+        source = code.encode()
+        
+        # Run the executable the probe resolved rather than searching PATH again
+        toolchain = self.toolchains.get(key) if self.toolchains else None
+        if toolchain is not None and toolchain.available:
+            command = [toolchain.path, *command[1:]]
         
+        with contextlib.ExitStack() as cleanup:
+            try:
+                workdir = None
+                if filename is not None:
+                    workdir = cleanup.enter_context(tempfile.TemporaryDirectory(prefix="validate-", dir=SCRATCH_PATH))
+                    with open(os.path.join(workdir, filename), "wb") as f:
+                        f.write(source)
+                    command = [*command, filename]
+                
+                sandboxed, options = self._sandbox(command, timeout, memory)
+                proc = await asyncio.create_subprocess_exec(
+                    *sandboxed,
+                    cwd=workdir,
+                    stdin=asyncio.subprocess.DEVNULL if workdir else asyncio.subprocess.PIPE,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    **options
+                )
+                pipes = asyncio.gather(
+                    self._read_capped(proc.stdout, proc),
+                    self._read_capped(proc.stderr, proc),
+                    self._feed(proc, None if workdir else source),
+                    proc.wait()
+                )
+                try:
+                    stdout, stderr, _, _ = await asyncio.wait_for(pipes, timeout)
+                except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+                    # The scratch directory is only removed once the tool is gone
+                    self._kill(proc)
+                    # Nothing awaits the cancelled reads any more, retrieve their outcome so it is not logged
+                    pipes.add_done_callback(lambda future: future.cancelled() or future.exception())
+                    await proc.wait()
+                    if isinstance(e, asyncio.CancelledError):
+                        raise
+                    return self._timed_out(timeout)
+            except Exception as e:
+                return {"valid": False, "unavailable": True, "error": f"Could not validate {language}: {str(e)}"}
+        
+        if proc.returncode == 0:
+            return {"valid": True}
+        if proc.returncode == 127 and sandboxed is not command:
+            # The shell that sets the limits could not run the tool
+            error = stderr.decode(errors="replace").strip()
+            return {"valid": False, "unavailable": True, "error": f"Could not validate {language}: {error}"}
+        if hasattr(signal, "SIGXCPU") and proc.returncode == -signal.SIGXCPU:
+            return self._timed_out(timeout)
+        error = (stderr or stdout) if use_stdout else stderr
+        return {"valid": False, "error": error.decode(errors="replace")}
+    
+    @staticmethod
+    async def _feed(proc: asyncio.subprocess.Process, source: Optional[bytes]):
+        """Write the source to the tool's stdin, if it reads it from there."""
+        if source is None:
+            return
         try:
-            proc = subprocess.Popen(
-                ["g++", "-fsyntax-only", temp_name],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            _, stderr = proc.communicate()
-            os.unlink(temp_name)
-            
-            if proc.returncode == 0:
-                return {"valid": True}
+            proc.stdin.write(source)
+            await proc.stdin.drain()
+            proc.stdin.close()
+        except (BrokenPipeError, ConnectionResetError):
+            # The tool stopped reading, its exit status and output tell why
+            pass
+    
+    @staticmethod
+    def _sandbox(command: List[str], cpu_seconds: int, memory: Optional[int]) -> Tuple[List[str], dict]:
+        """Wrap a command so the tool starts in a new session under resource limits.
+        
+        A shell sets the limits and then execs the tool in its place. Setting
+        them from preexec_fn is not safe while other threads run, and the
+        Python compiler and the toolchain probe use threads.
+        """
+        if not hasattr(os, "killpg"):
+            return command, {}
+        # Compilers may use several threads, so allow more CPU time than wall-clock time
+        limits = f"ulimit -t {cpu_seconds * 2}"
+        if memory is not None:
+            limits += f" && ulimit -v {memory // 1024}"
+        return ["/bin/sh", "-c", f'{limits} && exec "$@"', "sh", *command], {"start_new_session": True}
+    
+    @classmethod
+    async def _read_capped(cls, stream: asyncio.StreamReader, proc: asyncio.subprocess.Process) -> bytes:
+        """Read a pipe to the end, killing the tool if it writes more than MAX_OUTPUT bytes."""
+        output = b""
+        while len(output) < MAX_OUTPUT:
+            chunk = await stream.read(MAX_OUTPUT - len(output))
+            if not chunk:
+                return output
+            output += chunk
+        # A tool flooding its output would keep the loop busy reading, stop it here
+        cls._kill(proc)
+        return output + b"\n... (output truncated)"
+    
+    @staticmethod
+    def _kill(proc: asyncio.subprocess.Process):
+        """Kill a validator and everything it started."""
+        try:
+            if hasattr(os, "killpg"):
+                os.killpg(proc.pid, signal.SIGKILL)
             else:
-                return {"valid": False, "error": stderr}
-        except Exception as e:
-            try:
-                os.unlink(temp_name)
-            except:
-                pass
-            return {"valid": False, "error": f"Could not validate C++: {str(e)}"}
+                proc.kill()
+        except ProcessLookupError:
+            pass
+    
+    @staticmethod
+    def _timed_out(timeout: int) -> dict:
+        return {"valid": False, "timed_out": True, "error": f"Validation timed out after {timeout} seconds."}
 
-    async def _validate_csharp(self, code: str) -> dict:
-        with tempfile.NamedTemporaryFile(suffix=".cs", delete=False) as temp:
-            temp.write(code.encode())
-            temp_name = temp.name
-        
+    async def _validate_python(self, code: str) -> dict:
+        if len(code) > MAX_PYTHON_SIZE:
+            return {"valid": False, "error": f"Code is too long to validate (limit {MAX_PYTHON_SIZE} characters)."}
+        # Compiling is CPU-bound, keep it off the event loop
+        timeout = LANGUAGE_TIMEOUTS.get("python", DEFAULT_TIMEOUT)
         try:
-            proc = subprocess.Popen(
-                ["csc", "/nologo", "/out:nul", "/t:library", temp_name],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
+            return await asyncio.wait_for(
+                asyncio.get_running_loop().run_in_executor(None, self._compile_python, code), timeout
             )
-            _, stderr = proc.communicate()
-            os.unlink(temp_name)
-            
-            if proc.returncode == 0:
-                return {"valid": True}
-            else:
-                return {"valid": False, "error": stderr}
-        except Exception as e:
-            try:
-                os.unlink(temp_name)
-            except:
-                pass
-            return {"valid": False, "error": f"Could not validate C#: {str(e)}"}
+        except asyncio.TimeoutError:
+            return self._timed_out(timeout)
 
-    async def _validate_go(self, code: str) -> dict:
-        with tempfile.NamedTemporaryFile(suffix=".go", delete=False) as temp:
-            temp.write(code.encode())
-            temp_name = temp.name
-        
+    @staticmethod
+    def _compile_python(code: str) -> dict:
+        """Compile Python source in-process and describe the first syntax error."""
         try:
-            proc = subprocess.Popen(
-                ["go", "vet", temp_name],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            _, stderr = proc.communicate()
-            os.unlink(temp_name)
-            
-            if proc.returncode == 0:
-                return {"valid": True}
-            else:
-                return {"valid": False, "error": stderr}
-        except Exception as e:
-            try:
-                os.unlink(temp_name)
-            except:
-                pass
-            return {"valid": False, "error": f"Could not validate Go: {str(e)}"}
+            compile(code, "<snippet>", "exec", dont_inherit=True)
+        except SyntaxError as e:
+            if e.lineno is None:
+                return {"valid": False, "error": e.msg}
+            error = f"Line {e.lineno}, column {e.offset}: {e.msg}"
+            if e.text:
+                line = e.text.rstrip("\n")
+                error += f"\n    {line}\n    {' ' * max((e.offset or 1) - 1, 0)}^"
+            return {"valid": False, "error": error}
+        except (ValueError, RecursionError, MemoryError) as e:
+            # Null bytes, or nesting too deep for the compiler
+            return {"valid": False, "error": f"Could not compile the code: {e}"}
+        return {"valid": True}
+
+    async def _validate_javascript(self, code: str) -> dict:
+        result = await self._run_daemon("javascript", code)
+        if result is None:
+            result = await self._run_validator(code, "snippet.js", ["node", "--check"], "JavaScript")
+        return result
+
+    async def _validate_typescript(self, code: str) -> dict:
+        result = await self._run_daemon("typescript", code)
+        if result is None:
+            result = await self._run_validator(code, "snippet.ts", ["tsc", "--noEmit"], "TypeScript")
+        return result
+
+    async def _validate_java(self, code: str) -> dict:
+        result = await self._run_daemon("java", code)
+        if result is None:
+            result = await self._run_validator(code, f"{self._java_class_name(code)}.java", ["javac"], "Java")
+        return result
+
+    @staticmethod
+    def _java_class_name(code: str) -> str:
+        """javac insists a public class lives in a file of the same name."""
+        match = re.search(r"public\s+(?:(?:abstract|final|sealed|static|strictfp)\s+)*(?:class|interface|enum|record)\s+(\w+)", code)
+        return match.group(1) if match else "Main"
+
+    async def _validate_c(self, code: str) -> dict:
+        return await self._run_validator(code, None, ["gcc", "-fsyntax-only", "-x", "c", "-"], "C")
+
+    async def _validate_cpp(self, code: str) -> dict:
+        return await self._run_validator(code, None, ["g++", "-fsyntax-only", "-x", "c++", "-"], "C++")
+
+    async def _validate_csharp(self, code: str) -> dict:
+        return await self._run_validator(
+            code, "snippet.cs", ["csc", "/nologo", "/out:snippet.dll", "/t:library"], "C#"
+        )
+
+    async def _validate_go(self, code: str) -> dict:
+        return await self._run_validator(code, "snippet.go", ["go", "vet"], "Go")
 
     async def _validate_ruby(self, code: str) -> dict:
-        with tempfile.NamedTemporaryFile(suffix=".rb", delete=False) as temp:
-            temp.write(code.encode())
-            temp_name = temp.name
-        
-        try:
-            proc = subprocess.Popen(
-                ["ruby", "-c", temp_name],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            stdout, stderr = proc.communicate()
-            os.unlink(temp_name)
-            
-            if proc.returncode == 0:
-                return {"valid": True}
-            else:
-                return {"valid": False, "error": stderr or stdout}
-        except Exception as e:
-            try:
-                os.unlink(temp_name)
-            except:
-                pass
-            return {"valid": False, "error": f"Could not validate Ruby: {str(e)}"}
+        return await self._run_validator(code, None, ["ruby", "-c"], "Ruby", use_stdout=True)
 
     async def _validate_php(self, code: str) -> dict:
-        with tempfile.NamedTemporaryFile(suffix=".php", delete=False) as temp:
-            temp.write(code.encode())
-            temp_name = temp.name
-        
-        try:
-            proc = subprocess.Popen(
-                ["php", "-l", temp_name],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            stdout, stderr = proc.communicate()
-            os.unlink(temp_name)
-            
-            if proc.returncode == 0:
-                return {"valid": True}
-            else:
-                return {"valid": False, "error": stderr or stdout}
-        except Exception as e:
-            try:
-                os.unlink(temp_name)
-            except:
-                pass
-            return {"valid": False, "error": f"Could not validate PHP: {str(e)}"}
+        return await self._run_validator(code, None, ["php", "-l"], "PHP", use_stdout=True)
 
     async def _validate_rust(self, code: str) -> dict:
-        with tempfile.NamedTemporaryFile(suffix=".rs", delete=False) as temp:
-            temp.write(code.encode())
-            temp_name = temp.name
-        
-        try:
-            proc = subprocess.Popen(
-                ["rustc", "--emit=metadata", "-o", "/dev/null", temp_name],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            _, stderr = proc.communicate()
-            os.unlink(temp_name)
-            
-            if proc.returncode == 0:
-                return {"valid": True}
-            else:
-                return {"valid": False, "error": stderr}
-        except Exception as e:
-            try:
-                os.unlink(temp_name)
-            except:
-                pass
-            return {"valid": False, "error": f"Could not validate Rust: {str(e)}"}
+        return await self._run_validator(code, None, ["rustc", "--emit=metadata", "-o", "/dev/null", "-"], "Rust")
 
     async def _validate_bash(self, code: str) -> dict:
-        with tempfile.NamedTemporaryFile(suffix=".sh", delete=False) as temp:
-            temp.write(code.encode())
-            temp_name = temp.name
-        
-        try:
-            proc = subprocess.Popen(
-                ["bash", "-n", temp_name],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            _, stderr = proc.communicate()
-            os.unlink(temp_name)
-            
-            if proc.returncode == 0:
-                return {"valid": True}
-            else:
-                return {"valid": False, "error": stderr}
-        except Exception as e:
-            try:
-                os.unlink(temp_name)
-            except:
-                pass
-            return {"valid": False, "error": f"Could not validate Bash: {str(e)}"}
+        return await self._run_validator(code, None, ["bash", "-n"], "Bash")
 
     async def _validate_html(self, code: str) -> dict:
         # For HTML, we'll just check if it contains valid tags and structure
@@ -504,57 +579,11 @@ class CodeValidator(commands.Cog):
         return {"valid": True}
 
     async def _validate_swift(self, code: str) -> dict:
-        with tempfile.NamedTemporaryFile(suffix=".swift", delete=False) as temp:
-            temp.write(code.encode())
-            temp_name = temp.name
-        
-        try:
-            proc = subprocess.Popen(
-                ["swift", "-frontend", "-typecheck", temp_name],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            _, stderr = proc.communicate()
-            os.unlink(temp_name)
-            
-            if proc.returncode == 0:
-                return {"valid": True}
-            else:
-                return {"valid": False, "error": stderr}
-        except Exception as e:
-            try:
-                os.unlink(temp_name)
-            except:
-                pass
-            return {"valid": False, "error": f"Could not validate Swift: {str(e)}"}
+        return await self._run_validator(code, "snippet.swift", ["swift", "-frontend", "-typecheck"], "Swift")
 
     async def _validate_kotlin(self, code: str) -> dict:
-        with tempfile.NamedTemporaryFile(suffix=".kt", delete=False) as temp:
-            temp.write(code.encode())
-            temp_name = temp.name
-        
-        try:
-            proc = subprocess.Popen(
-                ["kotlinc", temp_name, "-include-runtime", "-d", "/dev/null"],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            _, stderr = proc.communicate()
-            os.unlink(temp_name)
-            
-            if proc.returncode == 0:
-                return {"valid": True}
-            else:
-                return {"valid": False, "error": stderr}
-        except Exception as e:
-            try:
-                os.unlink(temp_name)
-            except:
-                pass
-            return {"valid": False, "error": f"Could not validate Kotlin: {str(e)}"}
-            
+        return await self._run_validator(code, "snippet.kt", ["kotlinc", "-include-runtime", "-d", "/dev/null"], "Kotlin")
+
     async def _validate_sql(self, code: str) -> dict:
         # Basic SQL validation - checking for common syntax errors
         basic_errors = []
@@ -579,5 +608,13 @@ class CodeValidator(commands.Cog):
             return {"valid": False, "error": "\n".join(basic_errors)}
         return {"valid": True}
 
-def setup(bot):
-    bot.add_cog(CodeValidator(bot))
+    def cog_unload(self):
+        if self.probe_task is not None:
+            self.probe_task.cancel()
+        for daemon in self.daemons.values():
+            daemon.close()
+
+async def setup(bot):
+    cog = CodeValidator(bot)
+    await cog.initialize()
+    await bot.add_cog(cog)
@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import os
+import signal
+import time
+from typing import List, Optional, Tuple
+
+log = logging.getLogger("red.code_validator")
+
+# Seconds a helper may take to start and report that it is ready
+STARTUP_TIMEOUT = 60
+# Idle seconds after which a helper is pinged before it gets another snippet
+HEALTH_CHECK_IDLE = 60
+PING_TIMEOUT = 5
+# Seconds before starting a helper again after it failed to start or broke
+RETRY_DELAY = 300
+
+
+class ValidatorDaemon:
+    """A long-lived helper process that checks snippets sent over its stdin.
+
+    Helpers speak a small framed protocol: ``CHECK <bytes>\\n<code>`` is
+    answered with ``OK 0\\n`` or ``ERROR <bytes>\\n<message>``, and ``PING\\n``
+    with ``PONG\\n``. A helper is started on first use and checks one snippet
+    at a time. It is pinged after being idle for a while, replaced after
+    ``max_jobs`` snippets and killed if a snippet outlives its timeout.
+    Whenever no healthy helper is available `check` returns None, so the
+    caller can fall back to a one-shot run.
+    """
+
+    def __init__(self, language: str, command: List[str], max_jobs: int):
+        self.language = language
+        self.command = command
+        self.max_jobs = max_jobs
+        self.proc: Optional[asyncio.subprocess.Process] = None
+        self.jobs = 0
+        self.last_used = 0.0
+        self.retry_at = 0.0
+        self.lock = asyncio.Lock()
+
+    async def check(self, code: str, timeout: float) -> Optional[dict]:
+        """Check a snippet, or return None if the helper is unavailable.
+
+        Raises asyncio.TimeoutError if the helper takes longer than
+        ``timeout``; the helper is killed and restarted on next use.
+        """
+        if time.monotonic() < self.retry_at:
+            return None
+
+        async with self.lock:
+            if not await self._ensure_running():
+                return None
+
+            payload = code.encode("utf-8", "surrogatepass")
+            try:
+                self.proc.stdin.write(b"CHECK %d\n" % len(payload) + payload)
+                await self.proc.stdin.drain()
+                status, message = await asyncio.wait_for(self._read_response(), timeout)
+            except asyncio.TimeoutError:
+                self.close()
+                raise
+            except (OSError, ValueError, asyncio.IncompleteReadError) as e:
+                log.warning(f"The {self.language} validator helper broke, falling back to one-shot runs: {e}")
+                self._fail()
+                return None
+            except BaseException:
+                # Cancelled mid-request, the helper's output can no longer be trusted
+                self.close()
+                raise
+
+            self.jobs += 1
+            self.last_used = time.monotonic()
+            if self.jobs >= self.max_jobs:
+                # Recycle before slow leaks in the helper add up
+                self.close()
+
+        if status == "OK":
+            return {"valid": True}
+        return {"valid": False, "error": message}
+
+    async def _ensure_running(self) -> bool:
+        """Make sure a responsive helper is running, starting one if needed."""
+        if self.proc is not None and self.proc.returncode is None:
+            if time.monotonic() - self.last_used < HEALTH_CHECK_IDLE or await self._ping():
+                return True
+            log.info(f"The {self.language} validator helper stopped responding, restarting it")
+        self.close()
+
+        try:
+            self.proc = await asyncio.create_subprocess_exec(
+                *self.command,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+                start_new_session=hasattr(os, "killpg")
+            )
+            ready = await asyncio.wait_for(self.proc.stdout.readline(), STARTUP_TIMEOUT)
+            if ready != b"READY\n":
+                raise ValueError("the helper exited during start-up")
+        except (OSError, ValueError, asyncio.TimeoutError) as e:
+            log.warning(f"Could not start the {self.language} validator helper, using one-shot runs: {e}")
+            self._fail()
+            return False
+
+        self.jobs = 0
+        self.last_used = time.monotonic()
+        return True
+
+    async def _ping(self) -> bool:
+        try:
+            self.proc.stdin.write(b"PING\n")
+            await self.proc.stdin.drain()
+            return await asyncio.wait_for(self.proc.stdout.readline(), PING_TIMEOUT) == b"PONG\n"
+        except (OSError, asyncio.TimeoutError):
+            return False
+
+    async def _read_response(self) -> Tuple[str, str]:
+        header = (await self.proc.stdout.readline()).decode().split()
+        if len(header) != 2 or header[0] not in ("OK", "ERROR"):
+            raise ValueError(f"unexpected response {header!r}")
+        length = int(header[1])
+        body = await self.proc.stdout.readexactly(length) if length else b""
+        return header[0], body.decode(errors="replace")
+
+    def close(self):
+        """Kill the helper and everything it started."""
+        proc, self.proc = self.proc, None
+        if proc is None or proc.returncode is not None:
+            return
+        try:
+            if hasattr(os, "killpg"):
+                os.killpg(proc.pid, signal.SIGKILL)
+            else:
+                proc.kill()
+        except ProcessLookupError:
+            pass
+
+    def _fail(self):
+        self.close()
+        self.retry_at = time.monotonic() + RETRY_DELAY
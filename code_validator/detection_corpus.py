@@ -0,0 +1,241 @@
+"""Labelled snippets for measuring the language detector.
+
+Replays every snippet through `detect_language` and reports accuracy per
+language, the snippets it got wrong and the time each call takes. The
+snippets are the kind of short, unfenced code people paste into Discord,
+including ones that share keywords with other languages.
+
+Results are reported separately for the held-out set, which was never used
+to choose the weights and is the measure of real accuracy, and for the
+tuning set the weights were chosen against.
+
+Run from the repository root:
+
+    python -m code_validator.detection_corpus
+    python -m code_validator.detection_corpus --repeat 200 --json results.json
+"""
+
+import argparse
+import json
+import statistics
+import time
+from collections import Counter
+from typing import List, Tuple
+
+from .detector import detect_language
+
+# Snippets the feature weights were chosen against
+TUNING_SET: List[Tuple[str, str]] = [
+    ("python", "import os\n\nfor name in os.listdir('.'):\n    print(name)"),
+    ("python", "class Stack:\n    def __init__(self):\n        self.items = []\n\n    def push(self, item):\n        self.items.append(item)"),
+    ("python", "def fib(n):\n    if n < 2:\n        return n\n    return fib(n - 1) + fib(n - 2)"),
+    ("python", "import numpy as np\narr = np.zeros((3, 3))"),
+    ("python", "with open(path) as f:\n    data = [line.strip() for line in f if line]"),
+    ("python", "try:\n    value = int(text)\nexcept ValueError:\n    value = None"),
+    ("python", "@bot.command()\nasync def ping(ctx):\n    await ctx.send(f\"Pong {ctx.author}\")"),
+    ("python", "import random\nprint(random.randint(1, 6))"),
+    ("python", "name = input('Name: ')\nprint('Hello', name)"),
+    ("python", "numbers = [1, 2, 3]\ntotal = sum(numbers)\nprint(total)"),
+    ("javascript", "function add(a, b) {\n  return a + b;\n}\nconsole.log(add(1, 2));"),
+    ("javascript", "const express = require('express');\nconst app = express();\napp.listen(3000);"),
+    ("javascript", "document.querySelector('#btn').addEventListener('click', () => {\n  alert('hi');\n});"),
+    ("javascript", "import { readFile } from 'fs/promises';\nconst text = await readFile('a.txt', 'utf8');"),
+    ("javascript", "let total = 0;\nfor (const item of items) {\n  if (item.price !== undefined) total += item.price;\n}"),
+    ("javascript", "let count = 0;\ncount++;\nconsole.log(count);"),
+    ("typescript", "interface User {\n  id: number;\n  name: string;\n}\n\nfunction greet(user: User): string {\n  return `Hi ${user.name}`;\n}"),
+    ("typescript", "const ids: number[] = [];\nexport type Handler = (event: Event) => void;"),
+    ("typescript", "class Counter {\n  private readonly step: number = 1;\n  count(value: number): number {\n    return value + this.step;\n  }\n}"),
+    ("typescript", "function first<T>(items: T[]): T | undefined {\n  return items[0];\n}\nlet flag: boolean = false;"),
+    ("java", "public class Main {\n    public static void main(String[] args) {\n        System.out.println(\"Hello\");\n    }\n}"),
+    ("java", "import java.util.ArrayList;\nimport java.util.List;\n\nList<Integer> numbers = new ArrayList<>();"),
+    ("java", "@Override\npublic boolean equals(Object other) {\n    return other instanceof Point;\n}"),
+    ("java", "private final HashMap<String, Integer> counts = new HashMap<>();\npublic void add(String key) throws IOException {\n}"),
+    ("c#", "using System;\n\nclass Program\n{\n    static void Main(string[] args)\n    {\n        Console.WriteLine(\"Hello\");\n    }\n}"),
+    ("c#", "public class Person\n{\n    public string Name { get; set; }\n    public int Age { get; set; }\n}"),
+    ("c#", "namespace Shop\n{\n    public async Task<IEnumerable<Order>> LoadAsync() => await db.Orders.ToListAsync();\n}"),
+    ("c#", "foreach (var item in items)\n{\n    Console.WriteLine(item ?? \"none\");\n}"),
+    ("c", "#include <stdio.h>\n\nint main(void) {\n    printf(\"Hello\\n\");\n    return 0;\n}"),
+    ("c", "#include <stdlib.h>\n\nint *make(size_t n) {\n    int *p = malloc(n * sizeof(int));\n    if (p == NULL) return NULL;\n    return p;\n}"),
+    ("c", "typedef struct node {\n    int value;\n    struct node *next;\n} node_t;"),
+    ("c", "int main() {\n    int x;\n    scanf(\"%d\", &x);\n    printf(\"%d\\n\", x * 2);\n}"),
+    ("c++", "#include <iostream>\n\nint main() {\n    std::cout << \"Hello\" << std::endl;\n    return 0;\n}"),
+    ("c++", "#include <vector>\nusing namespace std;\n\nvector<int> v = {1, 2, 3};"),
+    ("c++", "class Shape {\npublic:\n    virtual double area() const = 0;\n    virtual ~Shape() = default;\n};"),
+    ("c++", "template <typename T>\nT max_of(T a, T b) {\n    return a > b ? a : b;\n}\nauto p = nullptr;"),
+    ("go", "package main\n\nimport \"fmt\"\n\nfunc main() {\n\tfmt.Println(\"Hello\")\n}"),
+    ("go", "func (s *Server) Start() error {\n\tln, err := net.Listen(\"tcp\", s.addr)\n\tif err != nil {\n\t\treturn err\n\t}\n\tdefer ln.Close()\n\treturn nil\n}"),
+    ("go", "results := make(chan int)\ngo worker(results)\nfor v := range results {\n\tfmt.Printf(\"%d\\n\", v)\n}"),
+    ("ruby", "def greet(name)\n  puts \"Hello, #{name}\"\nend"),
+    ("ruby", "class Dog\n  attr_accessor :name\n\n  def initialize(name)\n    @name = name\n  end\nend"),
+    ("ruby", "[1, 2, 3].each do |n|\n  puts n * 2\nend"),
+    ("ruby", "require 'json'\ndata = JSON.parse(text)\nputs data['key'] unless data.nil?"),
+    ("php", "<?php\necho \"Hello\";\n?>"),
+    ("php", "<?php\n\nfunction total(array $items) {\n    $sum = 0;\n    foreach ($items as $item) {\n        $sum += $item;\n    }\n    return $sum;\n}"),
+    ("php", "$name = isset($_GET['name']) ? $_GET['name'] : 'guest';\necho $name;"),
+    ("php", "class User {\n    public function __construct() {\n        $this->created = time();\n    }\n}"),
+    ("rust", "fn main() {\n    println!(\"Hello\");\n}"),
+    ("rust", "let mut v = vec![1, 2, 3];\nv.push(4);\nlet total: i32 = v.iter().sum();"),
+    ("rust", "impl Point {\n    pub fn new(x: f64, y: f64) -> Self {\n        Point { x, y }\n    }\n}"),
+    ("rust", "fn longest<'a>(a: &'a str, b: &'a str) -> &'a str {\n    if a.len() > b.len() { a } else { b }\n}"),
+    ("rust", "#[derive(Debug)]\nstruct Config {\n    name: String,\n}\nlet c = load().unwrap();"),
+    ("bash", "#!/bin/bash\nfor f in *.txt; do\n  echo \"$f\"\ndone"),
+    ("bash", "if [ -f config.yml ]; then\n  source .env\nfi"),
+    ("bash", "#!/usr/bin/env sh\nset -e\nmkdir -p build && cd build"),
+    ("bash", "count=$(ls | wc -l)\necho \"Files: ${count}\"\nexit 0"),
+    ("html", "<!DOCTYPE html>\n<html>\n<head><title>Test</title></head>\n<body><p>Hi</p></body>\n</html>"),
+    ("html", "<div class=\"card\">\n  <h1>Title</h1>\n  <p>Some text</p>\n</div>"),
+    ("html", "<ul>\n  <li><a href=\"/\">Home</a></li>\n  <li><a href=\"/about\">About</a></li>\n</ul>"),
+    ("css", "body {\n  margin: 0;\n  font-family: sans-serif;\n}"),
+    ("css", ".button:hover {\n  background: #333;\n  color: white;\n}"),
+    ("css", "#header {\n  display: flex;\n  padding: 10px 20px;\n  border-radius: 4px;\n}"),
+    ("css", "h1 {\n  font-size: 2em;\n  text-align: center !important;\n}"),
+    ("sql", "SELECT name, email FROM users WHERE active = 1 ORDER BY name;"),
+    ("sql", "CREATE TABLE users (\n  id INT PRIMARY KEY,\n  name VARCHAR(100) NOT NULL\n);"),
+    ("sql", "INSERT INTO orders (user_id, total) VALUES (1, 9.99);"),
+    ("sql", "select count(*) from orders where total > 100 group by user_id;"),
+    ("swift", "import SwiftUI\n\nstruct ContentView: View {\n    var body: some View {\n        Text(\"Hello\")\n    }\n}"),
+    ("swift", "func greet(name: String) -> String {\n    return \"Hello, \\(name)\"\n}"),
+    ("swift", "guard let url = URL(string: text) else {\n    return nil\n}"),
+    ("swift", "import Foundation\n\nlet numbers = [1, 2, 3]\nif let first = numbers.first {\n    print(first)\n}"),
+    ("swift", "let total = price * 2\nprint(total)"),
+    ("kotlin", "fun main() {\n    println(\"Hello\")\n}"),
+    ("kotlin", "data class User(val name: String, val age: Int)"),
+    ("kotlin", "val items = listOf(1, 2, 3)\nval doubled = items.map { it * 2 }"),
+    ("kotlin", "class Repo {\n    companion object {\n        lateinit var instance: Repo\n    }\n}"),
+    ("kotlin", "fun describe(x: Any): String = when (x) {\n    is Int -> \"int\"\n    else -> x.toString() ?: \"none\"\n}")
+]
+
+
+# Snippets that were never used to choose the feature weights. Accuracy on
+# this set is the one to trust; do not tune the weights against it, add
+# misdetected snippets to TUNING_SET instead and write fresh ones here.
+HELD_OUT: List[Tuple[str, str]] = [
+    ("python", "x = int(input())\nif x % 2 == 0:\n    print('even')\nelse:\n    print('odd')"),
+    ("python", "words = text.split()\ncounts = {}\nfor w in words:\n    counts[w] = counts.get(w, 0) + 1"),
+    ("python", "import discord\nfrom discord.ext import commands\n\nbot = commands.Bot(command_prefix='!')"),
+    ("python", "squares = [n ** 2 for n in range(10)]\nprint(squares)"),
+    ("python", "while True:\n    line = input('> ')\n    if not line:\n        break"),
+    ("python", "from datetime import datetime\nnow = datetime.now()\nprint(now.strftime('%H:%M'))"),
+    ("javascript", "const fs = require('fs');\nfs.readFile('data.json', (err, data) => {\n  if (err) throw err;\n  console.log(JSON.parse(data));\n});"),
+    ("javascript", "client.on('messageCreate', async (message) => {\n  if (message.author.bot) return;\n  await message.reply('pong');\n});"),
+    ("javascript", "const nums = [3, 1, 2];\nnums.sort((a, b) => a - b);\nconsole.log(nums);"),
+    ("javascript", "import React from 'react';"),
+    ("javascript", "import React from 'react'"),
+    ("typescript", "type Props = {\n  title: string;\n  count?: number;\n};\n\nexport function Header({ title }: Props) {\n  return title;\n}"),
+    ("typescript", "enum Color { Red, Green }\nconst c: Color = Color.Red;"),
+    ("typescript", "async function load(url: string): Promise<Response> {\n  return await fetch(url);\n}"),
+    ("java", "Scanner sc = new Scanner(System.in);\nint n = sc.nextInt();\nSystem.out.println(n * n);"),
+    ("java", "for (int i = 0; i < args.length; i++) {\n    System.out.println(args[i]);\n}"),
+    ("java", "public interface Animal {\n    String sound();\n}\n\nclass Cat implements Animal {\n    public String sound() { return \"meow\"; }\n}"),
+    ("c#", "var list = new List<int> { 1, 2, 3 };\nConsole.WriteLine(list.Count);"),
+    ("c#", "private void Update()\n{\n    transform.Translate(Vector3.forward * Time.deltaTime);\n}"),
+    ("c#", "using System.Linq;\n\nvar evens = numbers.Where(n => n % 2 == 0).ToList();"),
+    ("c", "#include <string.h>\n\nvoid reverse(char *s) {\n    int n = strlen(s);\n    for (int i = 0; i < n / 2; i++) {\n        char t = s[i]; s[i] = s[n - 1 - i]; s[n - 1 - i] = t;\n    }\n}"),
+    ("c", "FILE *f = fopen(\"out.txt\", \"w\");\nfprintf(f, \"%d\\n\", 42);\nfclose(f);"),
+    ("c", "int arr[5] = {0};\nfor (int i = 0; i < 5; i++)\n    printf(\"%d \", arr[i]);"),
+    ("c++", "std::string name;\nstd::getline(std::cin, name);"),
+    ("c++", "#include <map>\nstd::map<std::string, int> ages;\nages[\"bob\"] = 3;"),
+    ("c++", "for (auto& item : items) {\n    cout << item << endl;\n}"),
+    ("go", "type User struct {\n\tName string\n\tAge  int\n}\n\nfunc (u User) Greet() string {\n\treturn \"hi \" + u.Name\n}"),
+    ("go", "if err := run(); err != nil {\n\tlog.Fatal(err)\n}"),
+    ("go", "var wg sync.WaitGroup\nfor i := 0; i < 3; i++ {\n\twg.Add(1)\n\tgo work(i, &wg)\n}\nwg.Wait()"),
+    ("ruby", "5.times { |i| puts i }"),
+    ("ruby", "hash = { name: 'Bob', age: 3 }\nhash.each { |k, v| puts \"#{k}: #{v}\" }"),
+    ("ruby", "module Greeter\n  def self.hello\n    'hello'\n  end\nend"),
+    ("php", "<?php\n$pdo = new PDO($dsn, $user, $pass);\n$stmt = $pdo->query('SELECT 1');"),
+    ("php", "foreach ($users as $user) {\n    echo $user['name'] . \"\\n\";\n}"),
+    ("php", "<?php\nnamespace App\\Http;\n\nuse Illuminate\\Http\\Request;"),
+    ("rust", "use std::collections::HashMap;\n\nlet mut map = HashMap::new();\nmap.insert(\"a\", 1);"),
+    ("rust", "match value {\n    Some(v) => println!(\"{}\", v),\n    None => {}\n}"),
+    ("rust", "pub struct Stack<T> {\n    items: Vec<T>,\n}"),
+    ("bash", "for i in $(seq 1 5); do\n  echo $i\ndone"),
+    ("bash", "git add . && git commit -m \"update\"\ngit push origin main"),
+    ("bash", "while read -r line; do\n  echo \"$line\"\ndone < input.txt"),
+    ("bash", "echo $HOME"),
+    ("html", "<form action=\"/login\" method=\"post\">\n  <input type=\"text\" name=\"user\">\n  <button>Log in</button>\n</form>"),
+    ("html", "<table>\n  <tr><th>Name</th></tr>\n  <tr><td>Bob</td></tr>\n</table>"),
+    ("html", "<!-- nav -->\n<nav>\n  <a href=\"#top\">Top</a>\n</nav>"),
+    ("css", ".container {\n  max-width: 960px;\n  margin: 0 auto;\n}"),
+    ("css", "a {\n  color: #0af;\n  text-decoration: none;\n}\na:hover { text-decoration: underline; }"),
+    ("css", "@media (max-width: 600px) {\n  .sidebar { display: none; }\n}"),
+    ("sql", "UPDATE users SET name = 'Bob' WHERE id = 3;"),
+    ("sql", "SELECT u.name, COUNT(o.id) FROM users u LEFT JOIN orders o ON o.user_id = u.id GROUP BY u.name;"),
+    ("sql", "DELETE FROM sessions WHERE expires_at < NOW();"),
+    ("swift", "var scores: [String: Int] = [:]\nscores[\"bob\"] = 3\nprint(scores)"),
+    ("swift", "class ViewController: UIViewController {\n    override func viewDidLoad() {\n        super.viewDidLoad()\n    }\n}"),
+    ("swift", "let names = [\"a\", \"b\"]\nfor name in names {\n    print(name)\n}"),
+    ("kotlin", "val map = mutableMapOf<String, Int>()\nmap[\"a\"] = 1\nprintln(map)"),
+    ("kotlin", "class MainActivity : AppCompatActivity() {\n    override fun onCreate(savedInstanceState: Bundle?) {\n        super.onCreate(savedInstanceState)\n    }\n}"),
+    ("kotlin", "for (i in 1..10) {\n    if (i % 2 == 0) println(i)\n}")
+]
+
+
+def run(snippets: List[Tuple[str, str]], repeat: int) -> dict:
+    """Detect every snippet ``repeat`` times and collect accuracy and timings."""
+    results = {"snippets": len(snippets), "correct": 0, "per_language": {}, "mistakes": []}
+    totals, hits = Counter(), Counter()
+    timings = []
+    confidences = []
+    for expected, code in snippets:
+        started = time.perf_counter()
+        for _ in range(repeat):
+            detection = detect_language(code)
+        timings.append((time.perf_counter() - started) / repeat)
+
+        totals[expected] += 1
+        if detection.language == expected:
+            hits[expected] += 1
+            confidences.append(detection.confidence)
+        else:
+            results["mistakes"].append({
+                "expected": expected,
+                "detected": detection.language,
+                "confidence": detection.confidence,
+                "snippet": code.splitlines()[0]
+            })
+
+    results["correct"] = sum(hits.values())
+    results["accuracy"] = results["correct"] / len(snippets)
+    results["per_language"] = {language: hits[language] / totals[language] for language in sorted(totals)}
+    results["mean_confidence"] = statistics.fmean(confidences) if confidences else 0.0
+    results["mean_us"] = statistics.fmean(timings) * 1_000_000
+    results["max_us"] = max(timings) * 1_000_000
+    return results
+
+
+def format_results(title: str, results: dict) -> str:
+    lines = [
+        f"{title}:",
+        f"Accuracy: {results['correct']}/{results['snippets']} ({results['accuracy']:.1%}), "
+        f"mean confidence when right {results['mean_confidence']:.0%}",
+        f"Time per call: mean {results['mean_us']:.1f} µs, max {results['max_us']:.1f} µs",
+        ""
+    ]
+    lines.extend(f"{language:>12} {accuracy:>7.0%}" for language, accuracy in results["per_language"].items())
+    if results["mistakes"]:
+        lines.append("")
+        for mistake in results["mistakes"]:
+            lines.append(
+                f"expected {mistake['expected']}, got {mistake['detected']} "
+                f"({mistake['confidence']:.0%}): {mistake['snippet']}"
+            )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the CodeValidator language detector on labelled snippets.")
+    parser.add_argument("--repeat", type=int, default=100, help="detections per snippet when timing")
+    parser.add_argument("--json", dest="json_path", help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = {"tuning": run(TUNING_SET, args.repeat), "held_out": run(HELD_OUT, args.repeat)}
+    print(format_results("Held-out set", results["held_out"]))
+    print()
+    print(format_results("Tuning set", results["tuning"]))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
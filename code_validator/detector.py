@@ -0,0 +1,280 @@
+import math
+import re
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+# Smallest score a language needs before it counts as detected at all
+MIN_SCORE = 3
+# Score difference that makes one language e times likelier than another
+CONFIDENCE_SCALE = 3.0
+# Least confidence a detected language needs, well under every correct detection in the tuning set
+MIN_CONFIDENCE = 0.2
+# Share of a base language's weights that a superset language gets for the same evidence
+INHERITED_WEIGHT = 0.75
+
+# One pass over the snippet splits it into tokens. Strings and comments are
+# consumed whole so the words inside them never count as code, and the
+# alternatives are tried in order, so the specific ones come first.
+TOKEN_PATTERN = re.compile(
+    r"""
+    (?P<shebang>\A[ \t]*\#![ \t]*\S*/(?:env[ \t]+)?(?P<interpreter>[A-Za-z]+))
+    | (?P<directive>^[ \t]*\#[ \t]*(?P<name>include|define|ifndef|ifdef|pragma|endif)\b
+        (?:[ \t]*[<"](?P<header>[\w./+-]+)[>"])?)
+    | (?P<php_open><\?php\b)
+    | (?P<html_comment><!--)
+    | (?P<doctype>(?i:<!DOCTYPE)\b)
+    | (?P<html_tag></?(?:html|head|body|div|span|p|a|ul|ol|li|table|tr|td|th|h[1-6]|script|style|link|meta
+        |title|form|input|button|img|br|section|nav|header|footer|main|label)\b[^<>\n]*>)
+    | (?P<docstring>\"\"\"[\s\S]*?(?:\"\"\"|\Z)|'''[\s\S]*?(?:'''|\Z))
+    | (?P<lifetime>(?<=[&<])'[A-Za-z_]\w*(?!['\w]))
+    | (?P<string>"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*'|`(?:\\.|[^`\\])*`)
+    | (?P<line_comment>//[^\n]*)
+    | (?P<block_comment>/\*[\s\S]*?(?:\*/|\Z))
+    | (?P<hash_comment>\#(?=[ \t\n]|\Z)[^\n]*)
+    | (?P<dash_comment>--[ \t][^\n]*)
+    | (?P<unit>\b\d+(?:\.\d+)?(?:px|em|rem|vh|vw|pt)\b)
+    | (?P<number>\b\d[\w.]*)
+    | (?P<es_module>^[ \t]*(?=import[ \t]+(?:[\w$]+[ \t]*,?[ \t]*)?(?:\{[^}\n]*\}|\*[ \t]+as[ \t]+[\w$]+)?[ \t]*
+        from[ \t]*["']|export[ \t]+(?:default|const|let|var|function|class|async)\b|export[ \t]*[{*]))
+    | (?P<bare_assignment>^[ \t]*(?=[A-Za-z_][\w.]*(?:\[[^\]\n]*\])?[ \t]+=[ \t]+[^;{\n]*$))
+    | (?P<block_colon>:[ \t]*(?=\n|\Z))
+    | (?P<statement_end>;[ \t]*(?=\n|\Z))
+    | (?P<word>[$@]?[A-Za-z_]\w*)
+    | (?P<operator>:=|::|=>|->|\?\.|\?\?|\?:|===|!==|\.\.\.|\.\.|&&|\|\||\$\{|\$\(|\[\[|\]\])
+    | (?P<punct>\S)
+    """,
+    re.VERBOSE | re.MULTILINE
+)
+# Feature keys of the token kinds that are not looked up by their text
+KIND_KEYS = {
+    "php_open": "<?php",
+    "html_comment": "<!--",
+    "doctype": "<!DOCTYPE",
+    "html_tag": "<tag>",
+    "docstring": '"""',
+    "lifetime": "'a",
+    "string": "STR",
+    "line_comment": "//",
+    "block_comment": "/*",
+    "hash_comment": "#",
+    "dash_comment": "--",
+    "unit": "UNIT",
+    "number": "NUM",
+    "es_module": "import from",
+    "bare_assignment": "x = y",
+    "block_colon": ":\n",
+    "statement_end": ";\n"
+}
+
+Feature = Union[str, Tuple[str, str]]
+
+# Evidence for each language. Keys are word, operator or punctuation tokens,
+# the kind keys above, or (previous, current) token pairs. Each feature
+# counts once per snippet however often it appears.
+LANGUAGE_FEATURES: Dict[str, Dict[Feature, float]] = {
+    "python": {
+        "#!python": 20, "def": 3, "elif": 4, "self": 2, "None": 3, "True": 1, "False": 1, "import": 2,
+        "from": 1, "x = y": 2, ("print", "("): 2, ("input", "("): 2, "as": 2, "lambda": 2, "pass": 2,
+        "print": 1, "__init__": 4, "__name__": 4, '"""': 3, ":\n": 3, "#": 1, "except": 2, "raise": 2,
+        "with": 1, "yield": 1, "nonlocal": 5, "and": 1, "or": 1, "not": 1, "is": 1, "@property": 4,
+        "@staticmethod": 5, "@classmethod": 5, ("in", "range"): 3, ("f", "STR"): 3, ("if", "__name__"): 4,
+        ("import", "os"): 2, ("import", "sys"): 2, "import from": -4
+    },
+    "javascript": {
+        "#!node": 20, "function": 3, "const": 2, "let": 1, "var": 1, "console": 4, "=>": 2, "===": 4,
+        "!==": 4, "undefined": 3, "null": 1, "require": 2, "exports": 3, "document": 4, "window": 3,
+        "async": 1, "await": 1, "this": 1, "new": 1, "typeof": 3, "prototype": 4, "JSON": 2, "?.": 2,
+        "??": 1, "//": 1, ";\n": 1, "import from": 6, ("import", "{"): 2, ("from", "STR"): 2, ("module", "."): 3,
+        ("export", "default"): 3, ("addEventListener", "("): 4
+    },
+    "typescript": {
+        "interface": 3, "readonly": 3, "keyof": 6, "unknown": 2, "never": 2, "enum": 1, "implements": 1,
+        "private": 1, "public": 1, "as": 1, (":", "string"): 5, (":", "number"): 5, (":", "boolean"): 5,
+        (":", "any"): 5, (":", "void"): 4, ("export", "interface"): 4, ("export", "type"): 4,
+        ("string", "["): 3, ("number", "["): 3
+    },
+    "java": {
+        ("public", "class"): 4, ("static", "void"): 3, "System": 3, "String": 2, ("String", "["): 3,
+        "@Override": 5, ("import", "java"): 8, ("package", "com"): 4, "extends": 2, "implements": 2,
+        "final": 2, "private": 1, "public": 1, "protected": 1, "new": 1, "throws": 5, "boolean": 3,
+        "println": 1, "ArrayList": 3, "HashMap": 3, "Integer": 2, "null": 1, "instanceof": 3,
+        "synchronized": 4, "//": 1, ";\n": 1
+    },
+    "c#": {
+        ("using", "System"): 8, "namespace": 3, "Console": 5, "WriteLine": 4, "string": 2, "var": 1,
+        "=>": 1, ("get", ";"): 4, ("set", ";"): 3, ("static", "void"): 2, ("void", "Main"): 5,
+        "public": 1, "private": 1, "async": 1, "await": 1, "Task": 3, "foreach": 3, "readonly": 1,
+        "override": 1, "IEnumerable": 5, "null": 1, "bool": 2, "??": 2, "//": 1, ";\n": 1
+    },
+    "c": {
+        "#include": 3, "<h>": 3, "#define": 3, "#ifndef": 2, "printf": 3, "scanf": 4, "malloc": 4,
+        "free": 1, "int": 1, ("int", "main"): 2, "char": 1, "void": 1, "struct": 1, "NULL": 2,
+        "sizeof": 2, "unsigned": 2, "typedef": 3, "->": 1, "//": 1, "/*": 1, ";\n": 1
+    },
+    "c++": {
+        "<>": 6, "std": 6, "::": 2, "cout": 6, "cin": 4, "endl": 5, "class": 1, "template": 4,
+        "namespace": 2, ("using", "namespace"): 5, "nullptr": 6, "auto": 1, "vector": 3, "virtual": 4,
+        ("public", ":\n"): 4, ("private", ":\n"): 4, "bool": 1, "new": 1
+    },
+    "go": {
+        ("package", "main"): 8, "package": 2, "func": 3, ":=": 4, "fmt": 5, ("import", "STR"): 3,
+        ("import", "("): 3, "chan": 5, "defer": 5, "go": 1, ("func", "main"): 4, ("func", "("): 3,
+        "struct": 1, "nil": 2, "range": 1, "interface": 1, "Println": 3, "Printf": 3, "err": 2,
+        ("err", "!="): 4, "make": 1, "//": 1
+    },
+    "ruby": {
+        "#!ruby": 20, "def": 2, "end": 3, "puts": 5, "require": 2, "nil": 2, "elsif": 6, "unless": 4,
+        "x = y": 1, "attr_accessor": 8, "attr_reader": 8, "do": 1, "each": 2, "module": 1, "#": 1,
+        "@ivar": 3, ("do", "|"): 4, "yield": 1, "self": 1, "then": 1, ("end", "."): 2, "initialize": 5,
+        "=>": 1, "..": 1
+    },
+    "php": {
+        "<?php": 30, "#!php": 20, "$var": 3, "$this": 6, "echo": 2, "->": 1, "function": 2, "=>": 1,
+        "array": 2, "public": 1, "namespace": 1, "use": 1, "foreach": 2, ("$var", "="): 2, "new": 1,
+        "require_once": 6, "include": 2, "isset": 6, "null": 1, ";\n": 1
+    },
+    "rust": {
+        "fn": 5, ("let", "mut"): 6, "mut": 3, "impl": 5, "pub": 3, "use": 1, "::": 1, "->": 1,
+        ("println", "!"): 6, ("vec", "!"): 6, ("format", "!"): 5, "match": 2, "Some": 3, "None": 1,
+        "Ok": 2, "Err": 3, "Option": 2, "Result": 2, "trait": 5, "struct": 1, "enum": 1, "crate": 5,
+        "self": 1, "Self": 3, "u8": 4, "u32": 4, "i32": 4, "i64": 4, "usize": 5, "str": 2, "String": 1,
+        "loop": 2, "where": 1, "'a": 3, "unwrap": 5, ("&", "str"): 4, ("&", "mut"): 5, ("#", "["): 5,
+        "=>": 1, "//": 1, ";\n": 1
+    },
+    "bash": {
+        "#!bash": 20, "#!sh": 20, "#!zsh": 20, "echo": 3, "fi": 6, "then": 3, "done": 5, "esac": 8,
+        "elif": 2, "$var": 2, "${": 4, "$(": 4, "[[": 4, ("[", "-"): 3, ("$", "NUM"): 3, "export": 2,
+        "local": 2, "sudo": 3, "cd": 2, "source": 2, "mkdir": 2, "chmod": 3, "grep": 2, "do": 1,
+        "exit": 1, "read": 1, "#": 1, "|": 1
+    },
+    "html": {
+        "<!DOCTYPE": 30, "<tag>": 6, "<!--": 3
+    },
+    "css": {
+        "UNIT": 4, ("color", ":"): 3, ("margin", ":"): 4, ("padding", ":"): 4, ("display", ":"): 4,
+        ("background", ":"): 3, ("border", ":"): 3, ("width", ":"): 2, ("height", ":"): 2,
+        ("size", ":"): 3, ("weight", ":"): 3, ("align", ":"): 3, ("family", ":"): 4, ("!", "important"): 6,
+        (":", "hover"): 4, ("body", "{"): 3, ("position", ":"): 3, ("radius", ":"): 4
+    },
+    "sql": {
+        "SELECT": 6, "FROM": 3, "WHERE": 4, "INSERT": 5, "INTO": 3, "VALUES": 4, "UPDATE": 4, "SET": 1,
+        "DELETE": 4, "CREATE": 3, "TABLE": 4, "JOIN": 5, "GROUP": 3, "ORDER": 3, "BY": 2, "PRIMARY": 4,
+        "KEY": 1, "NOT": 1, "NULL": 1, "VARCHAR": 6, "INT": 2, "AND": 1, "LIMIT": 3, "DISTINCT": 4,
+        "HAVING": 5, "ALTER": 4, "DROP": 3, "select": 3, "where": 2, "insert": 2, "into": 1, "varchar": 5,
+        "--": 2, ("group", "by"): 3, ("order", "by"): 3, ("GROUP", "BY"): 3, ("ORDER", "BY"): 3,
+        ("PRIMARY", "KEY"): 3, ("SELECT", "*"): 4, ("select", "*"): 4, ("COUNT", "("): 3
+    },
+    "swift": {
+        "func": 3, ("import", "Foundation"): 8, ("import", "SwiftUI"): 8, ("import", "UIKit"): 8,
+        "let": 2, "var": 1, "guard": 6, "print": 1, "->": 1, "struct": 1, "extension": 4, "protocol": 5,
+        "inout": 6, "init": 4, "self": 1, "nil": 2, "some": 2, "@State": 6, "Int": 1, "Double": 1,
+        "String": 1, ("print", "("): 2, "weak": 2, "override": 1, "mutating": 6, "fileprivate": 8,
+        "enum": 1, "??": 2, ("if", "let"): 5, ("guard", "let"): 3
+    },
+    "kotlin": {
+        "fun": 6, "val": 4, "var": 1, ("fun", "main"): 3, "println": 2, ("data", "class"): 6, "when": 3,
+        "?:": 4, ("import", "kotlin"): 8, "object": 2, "companion": 8, "override": 1, "lateinit": 8,
+        "suspend": 6, "Int": 1, "String": 1, "listOf": 6, "mutableListOf": 8, "it": 1, "null": 1,
+        "is": 1, "..": 1, "internal": 3, "open": 2, "sealed": 3, "init": 1
+    }
+}
+# Supersets that also get a share of their base language's evidence
+INHERITS = {"typescript": "javascript", "c++": "c"}
+# Languages in the order ties are broken, base languages before their supersets
+LANGUAGES = tuple(LANGUAGE_FEATURES)
+
+
+def _compile_features() -> Dict[Feature, Tuple[Tuple[str, float], ...]]:
+    """Invert the per-language tables into one lookup from feature to weights."""
+    weights: Dict[Feature, Dict[str, float]] = {}
+    for language, features in LANGUAGE_FEATURES.items():
+        for feature, weight in features.items():
+            weights.setdefault(feature, {})[language] = weight
+    for language, base in INHERITS.items():
+        for feature, weight in LANGUAGE_FEATURES[base].items():
+            by_language = weights[feature]
+            by_language[language] = max(by_language.get(language, 0), weight * INHERITED_WEIGHT)
+    return {
+        feature: tuple((language, weight) for language, weight in by_language.items() if weight)
+        for feature, by_language in weights.items()
+    }
+
+
+FEATURES = _compile_features()
+
+
+class Detection(NamedTuple):
+    """Outcome of detecting a snippet's language.
+
+    ``ranking`` lists every language with a positive score, best first, as
+    (language, confidence) pairs whose confidences add up to 1.
+    """
+
+    language: Optional[str]
+    confidence: float
+    ranking: List[Tuple[str, float]]
+
+
+def _token_keys(match: "re.Match") -> Tuple[str, ...]:
+    kind = match.lastgroup
+    text = match.group()
+    if kind in ("word", "operator", "punct"):
+        if text[0] in "$@" and text not in FEATURES:
+            # Variables and instance variables rarely share names with keywords
+            return ("$var" if text[0] == "$" else "@ivar",)
+        return (text,)
+    if kind == "shebang":
+        return ("#!" + match.group("interpreter").lower(),)
+    if kind == "directive":
+        header = match.group("header")
+        if header is None:
+            return ("#" + match.group("name"),)
+        # C headers end in .h, the C++ standard library's do not
+        return ("#" + match.group("name"), "<h>" if header.endswith(".h") else "<>")
+    return (KIND_KEYS[kind],)
+
+
+def score_languages(code: str) -> Dict[str, float]:
+    """Score every language against the snippet in a single pass over its tokens."""
+    scores = dict.fromkeys(LANGUAGES, 0.0)
+    seen = set()
+    previous = None
+    for match in TOKEN_PATTERN.finditer(code):
+        for key in _token_keys(match):
+            for feature in (key, (previous, key)):
+                weights = FEATURES.get(feature)
+                if weights is None or feature in seen:
+                    continue
+                seen.add(feature)
+                for language, weight in weights:
+                    scores[language] += weight
+            previous = key
+    return scores
+
+
+def detect_language(code: str) -> Detection:
+    """Rank the languages the snippet could be written in.
+
+    Confidences are a softmax over the scores, so a clear winner gets close
+    to 1 while languages with similar evidence split it. The language is
+    None when nothing scored at least `MIN_SCORE`, or when the evidence is
+    too weak to choose: the best two languages tie or the best one has
+    less than `MIN_CONFIDENCE`.
+    """
+    scores = score_languages(code)
+    order = {language: index for index, language in enumerate(LANGUAGES)}
+    ranked = sorted(
+        (item for item in scores.items() if item[1] > 0), key=lambda item: (-item[1], order[item[0]])
+    )
+    if not ranked:
+        return Detection(None, 0.0, [])
+
+    best = ranked[0][1]
+    odds = [math.exp((score - best) / CONFIDENCE_SCALE) for _, score in ranked]
+    total = sum(odds)
+    ranking = [(language, odd / total) for (language, _), odd in zip(ranked, odds)]
+    if best < MIN_SCORE:
+        return Detection(None, 0.0, ranking)
+    if (len(ranked) > 1 and ranked[1][1] == best) or ranking[0][1] < MIN_CONFIDENCE:
+        # Picking one would come down to table order, which says nothing about the code
+        return Detection(None, 0.0, ranking)
+    return Detection(ranking[0][0], ranking[0][1], ranking)
@@ -0,0 +1,129 @@
+import java.io.BufferedInputStream;
+import java.io.ByteArrayOutputStream;
+import java.io.FileDescriptor;
+import java.io.FileOutputStream;
+import java.io.IOException;
+import java.io.InputStream;
+import java.io.OutputStream;
+import java.io.PrintStream;
+import java.net.URI;
+import java.nio.charset.StandardCharsets;
+import java.util.List;
+import java.util.Locale;
+import java.util.regex.Matcher;
+import java.util.regex.Pattern;
+
+import javax.tools.Diagnostic;
+import javax.tools.DiagnosticCollector;
+import javax.tools.FileObject;
+import javax.tools.ForwardingJavaFileManager;
+import javax.tools.JavaCompiler;
+import javax.tools.JavaFileManager;
+import javax.tools.JavaFileObject;
+import javax.tools.SimpleJavaFileObject;
+import javax.tools.ToolProvider;
+
+/**
+ * Warm syntax checker used by the CodeValidator cog.
+ *
+ * Usage: java JavaValidator.java
+ *
+ * Reads "CHECK <bytes>\n<code>" or "PING\n" frames on stdin and answers
+ * "OK 0\n", "ERROR <bytes>\n<message>" or "PONG\n" on stdout. Snippets are
+ * compiled in memory with javax.tools and the class files are discarded.
+ */
+public class JavaValidator {
+    private static final Pattern PUBLIC_TYPE = Pattern.compile(
+        "public\\s+(?:(?:abstract|final|sealed|static|strictfp)\\s+)*(?:class|interface|enum|record)\\s+(\\w+)");
+
+    public static void main(String[] args) throws IOException {
+        JavaCompiler compiler = ToolProvider.getSystemJavaCompiler();
+        if (compiler == null) {
+            System.err.println("No Java compiler available, a JDK is required");
+            System.exit(1);
+        }
+        JavaFileManager fileManager = new ForwardingJavaFileManager<JavaFileManager>(
+                compiler.getStandardFileManager(null, Locale.ROOT, StandardCharsets.UTF_8)) {
+            @Override
+            public JavaFileObject getJavaFileForOutput(
+                    Location location, String className, JavaFileObject.Kind kind, FileObject sibling) {
+                URI uri = URI.create("mem:///" + className.replace('.', '/') + kind.extension);
+                return new SimpleJavaFileObject(uri, kind) {
+                    @Override
+                    public OutputStream openOutputStream() {
+                        return OutputStream.nullOutputStream();
+                    }
+                };
+            }
+        };
+
+        InputStream in = new BufferedInputStream(System.in);
+        PrintStream out = new PrintStream(new FileOutputStream(FileDescriptor.out), false, StandardCharsets.UTF_8);
+        out.print("READY\n");
+        out.flush();
+
+        String header;
+        while ((header = readLine(in)) != null) {
+            if (header.equals("PING")) {
+                out.print("PONG\n");
+                out.flush();
+                continue;
+            }
+            int length = Integer.parseInt(header.substring(header.indexOf(' ') + 1));
+            String code = new String(in.readNBytes(length), StandardCharsets.UTF_8);
+            String error = check(compiler, fileManager, code);
+            if (error == null) {
+                out.print("OK 0\n");
+            } else {
+                byte[] payload = error.getBytes(StandardCharsets.UTF_8);
+                out.print("ERROR " + payload.length + "\n");
+                out.write(payload, 0, payload.length);
+            }
+            out.flush();
+        }
+    }
+
+    private static String check(JavaCompiler compiler, JavaFileManager fileManager, String code) {
+        // javac insists a public class lives in a file of the same name
+        Matcher matcher = PUBLIC_TYPE.matcher(code);
+        String name = matcher.find() ? matcher.group(1) : "Main";
+        JavaFileObject source = new SimpleJavaFileObject(
+                URI.create("string:///" + name + ".java"), JavaFileObject.Kind.SOURCE) {
+            @Override
+            public CharSequence getCharContent(boolean ignoreEncodingErrors) {
+                return code;
+            }
+        };
+
+        DiagnosticCollector<JavaFileObject> diagnostics = new DiagnosticCollector<>();
+        boolean valid = compiler.getTask(
+            null, fileManager, diagnostics, List.of("-proc:none"), null, List.of(source)).call();
+        if (valid) {
+            return null;
+        }
+
+        StringBuilder report = new StringBuilder();
+        for (Diagnostic<? extends JavaFileObject> diagnostic : diagnostics.getDiagnostics()) {
+            if (diagnostic.getKind() != Diagnostic.Kind.ERROR) {
+                continue;
+            }
+            report.append(name).append(".java:")
+                .append(diagnostic.getLineNumber()).append(':')
+                .append(diagnostic.getColumnNumber()).append(": error: ")
+                .append(diagnostic.getMessage(Locale.ROOT)).append('\n');
+        }
+        return report.toString();
+    }
+
+    private static String readLine(InputStream in) throws IOException {
+        ByteArrayOutputStream line = new ByteArrayOutputStream();
+        int next;
+        while ((next = in.read()) != -1 && next != '\n') {
+            line.write(next);
+        }
+        if (next == -1 && line.size() == 0) {
+            return null;
+        }
+        return line.toString(StandardCharsets.UTF_8);
+    }
+}
@@ -0,0 +1,171 @@
+"use strict";
+// Warm syntax checker used by the CodeValidator cog.
+//
+// Usage: node node_validator.js javascript
+//        node node_validator.js typescript /path/to/typescript
+//
+// Checks a few known snippets at start-up and exits without reporting ready
+// if any comes out wrong, so the cog falls back to one-shot runs.
+//
+// Reads "CHECK <bytes>\n<code>" or "PING\n" frames on stdin and answers
+// "OK 0\n", "ERROR <bytes>\n<message>" or "PONG\n" on stdout.
+
+const childProcess = require("child_process");
+const vm = require("vm");
+
+const mode = process.argv[2];
+const ts = mode === "typescript" ? require(process.argv[3]) : null;
+
+// The snippet lives at the root of a virtual directory so it never clashes with real files
+const SNIPPET = "/snippet.ts";
+// Default library files are parsed once and reused for every snippet
+const libraryFiles = new Map();
+
+// Errors that `node --check` takes as a sign the file is an ES module and parses it again as one
+const MODULE_ONLY_ERRORS = [
+    "Cannot use import statement outside a module",
+    "Unexpected token 'export'",
+    "Cannot use 'import.meta' outside a module",
+    "await is only valid in async functions and the top level bodies of modules",
+    "Identifier 'module' has already been declared",
+    "Identifier 'exports' has already been declared",
+    "Identifier 'require' has already been declared",
+    "Identifier '__filename' has already been declared",
+    "Identifier '__dirname' has already been declared"
+];
+
+function withoutFrames(stack) {
+    const frames = stack.indexOf("\n    at ");
+    return frames === -1 ? stack : stack.slice(0, frames);
+}
+
+function checkJavaScript(code) {
+    try {
+        // Same wrapper as a CommonJS module, which is what `node --check` parses first
+        vm.compileFunction(code, ["exports", "require", "module", "__filename", "__dirname"], {
+            filename: "snippet.js"
+        });
+        return null;
+    } catch (err) {
+        if (err instanceof SyntaxError && MODULE_ONLY_ERRORS.includes(err.message)) {
+            return checkModule(code);
+        }
+        return withoutFrames(String(err && err.stack || err));
+    }
+}
+
+function checkModule(code) {
+    // vm has no stable way to parse a module, so let node check it the way `node --check` would
+    const result = childProcess.spawnSync(process.execPath, ["--input-type=module", "--check"], {
+        input: code,
+        encoding: "utf8"
+    });
+    if (result.error) {
+        return String(result.error);
+    }
+    if (result.status === 0) {
+        return null;
+    }
+    return withoutFrames(result.stderr.replace(/^\[stdin\]/, "snippet.js"));
+}
+
+function checkTypeScript(code) {
+    const options = { noEmit: true };
+    const host = ts.createCompilerHost(options);
+    const getSourceFile = host.getSourceFile;
+    const fileExists = host.fileExists;
+    const readFile = host.readFile;
+
+    host.getCurrentDirectory = () => "/";
+    host.fileExists = (name) => name === SNIPPET || fileExists.call(host, name);
+    host.readFile = (name) => name === SNIPPET ? code : readFile.call(host, name);
+    host.getSourceFile = (name, languageVersion, onError) => {
+        if (name === SNIPPET) {
+            return ts.createSourceFile(name, code, languageVersion);
+        }
+        let file = libraryFiles.get(name);
+        if (file === undefined) {
+            file = getSourceFile.call(host, name, languageVersion, onError);
+            libraryFiles.set(name, file);
+        }
+        return file;
+    };
+
+    const program = ts.createProgram([SNIPPET], options, host);
+    const diagnostics = ts.getPreEmitDiagnostics(program);
+    if (!diagnostics.length) {
+        return null;
+    }
+    return ts.formatDiagnostics(diagnostics, {
+        getCanonicalFileName: (name) => name,
+        getCurrentDirectory: () => "/",
+        getNewLine: () => "\n"
+    });
+}
+
+const check = ts ? checkTypeScript : checkJavaScript;
+
+// Snippets the checker must accept (true) or reject (false) before the helper reports ready
+const SELF_CHECK = ts ? [
+    [true, "export const answer: number = 42;"],
+    [true, "const items: string[] = [];\nexport default items;"],
+    [false, "const answer: number = ;"]
+] : [
+    [true, "const fs = require('fs');\nmodule.exports = fs;"],
+    [true, "import fs from 'fs';\nexport const read = fs.readFileSync;"],
+    [true, "export default function main() {}"],
+    [true, "const data = await fetch(import.meta.url);"],
+    [false, "const = 1;"],
+    [false, "import fs from 'fs';\nconst = 1;"]
+];
+
+function selfCheck() {
+    for (const [valid, code] of SELF_CHECK) {
+        if ((check(code) === null) !== valid) {
+            process.stderr.write(`Self-check failed, expected ${valid ? "valid" : "invalid"}: ${code}\n`);
+            process.exit(1);
+        }
+    }
+}
+
+function respond(error) {
+    if (error === null) {
+        process.stdout.write("OK 0\n");
+        return;
+    }
+    const payload = Buffer.from(error, "utf8");
+    process.stdout.write(`ERROR ${payload.length}\n`);
+    process.stdout.write(payload);
+}
+
+let buffer = Buffer.alloc(0);
+
+function drain() {
+    for (;;) {
+        const newline = buffer.indexOf(10);
+        if (newline === -1) {
+            return;
+        }
+        const header = buffer.subarray(0, newline).toString("utf8").split(" ");
+        if (header[0] === "PING") {
+            buffer = buffer.subarray(newline + 1);
+            process.stdout.write("PONG\n");
+            continue;
+        }
+        const length = Number(header[1]);
+        if (buffer.length < newline + 1 + length) {
+            return;
+        }
+        const code = buffer.subarray(newline + 1, newline + 1 + length).toString("utf8");
+        buffer = buffer.subarray(newline + 1 + length);
+        respond(check(code));
+    }
+}
+
+process.stdin.on("data", (chunk) => {
+    buffer = Buffer.concat([buffer, chunk]);
+    drain();
+});
+process.stdin.on("end", () => process.exit(0));
+selfCheck();
+process.stdout.write("READY\n");
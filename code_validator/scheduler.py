@@ -0,0 +1,166 @@
+import asyncio
+from collections import OrderedDict, deque
+from typing import Awaitable, Callable, Deque, Dict, Mapping, Optional
+
+
+class QueueFull(Exception):
+    """Raised when a user already has the maximum number of validations waiting."""
+
+
+class Job:
+    __slots__ = ("language", "started", "wake")
+
+    def __init__(self, language: str):
+        self.language = language
+        self.started = False
+        self.wake = asyncio.Event()
+
+
+class ValidationScheduler:
+    """Limits how many validations run at once and shares the slots fairly.
+
+    Waiting jobs are queued per user and users per guild. Free slots are
+    handed out round-robin, first across guilds and then across the users
+    of a guild, so one busy user or server cannot starve everyone else.
+    Heavy toolchains have their own, smaller caps on top of the global one;
+    a job whose language is at its cap is passed over until a slot frees up.
+    """
+
+    def __init__(self, max_concurrent: int, language_limits: Mapping[str, int], max_queued_per_user: int):
+        self.max_concurrent = max_concurrent
+        self.language_limits = language_limits
+        self.max_queued_per_user = max_queued_per_user
+        self.queues: "OrderedDict[int, OrderedDict[int, Deque[Job]]]" = OrderedDict()
+        self.running = 0
+        self.running_by_language: Dict[str, int] = {}
+
+    async def run(
+        self,
+        guild_id: int,
+        user_id: int,
+        language: str,
+        validate: Callable[[], Awaitable[dict]],
+        on_queued: Optional[Callable[[int], Awaitable[None]]] = None
+    ) -> dict:
+        """Wait for a free slot, then run ``validate`` in it.
+
+        While the job waits, ``on_queued`` is called with its position in the
+        queue every time that position changes. Raises QueueFull if the user
+        already has too many jobs waiting.
+        """
+        users = self.queues.get(guild_id)
+        jobs = users.get(user_id) if users else None
+        if jobs and len(jobs) >= self.max_queued_per_user:
+            raise QueueFull()
+
+        job = Job(language)
+        self.queues.setdefault(guild_id, OrderedDict()).setdefault(user_id, deque()).append(job)
+        self._dispatch()
+
+        try:
+            reported = None
+            while not job.started:
+                job.wake.clear()
+                position = self.position(job)
+                if on_queued is not None and position != reported:
+                    reported = position
+                    await on_queued(position)
+                if not job.started:
+                    await job.wake.wait()
+        except BaseException:
+            if not job.started:
+                self._remove(guild_id, user_id, job)
+                self._dispatch()
+                raise
+            self._finish(job)
+            raise
+
+        try:
+            return await validate()
+        finally:
+            self._finish(job)
+
+    def position(self, job: Job) -> int:
+        """Return how many slots must be handed out before ``job`` gets one, including its own.
+
+        Language caps are ignored, so this is the position the job would have
+        if every waiting job could start.
+        """
+        guilds = deque(
+            deque(deque(jobs) for jobs in users.values()) for users in self.queues.values()
+        )
+        position = 0
+        while guilds:
+            users = guilds.popleft()
+            jobs = users.popleft()
+            position += 1
+            if jobs.popleft() is job:
+                return position
+            if jobs:
+                users.append(jobs)
+            if users:
+                guilds.append(users)
+        return 0
+
+    @property
+    def waiting(self) -> int:
+        return sum(len(jobs) for users in self.queues.values() for jobs in users.values())
+
+    def _can_start(self, language: str) -> bool:
+        limit = self.language_limits.get(language)
+        return limit is None or self.running_by_language.get(language, 0) < limit
+
+    def _next_job(self) -> Optional[Job]:
+        """Take the next startable job, round-robin over guilds and then users."""
+        for guild_id, users in self.queues.items():
+            for user_id, jobs in users.items():
+                if not self._can_start(jobs[0].language):
+                    continue
+                job = jobs.popleft()
+                # Served guilds and users go to the back of the line
+                if jobs:
+                    users.move_to_end(user_id)
+                else:
+                    del users[user_id]
+                if users:
+                    self.queues.move_to_end(guild_id)
+                else:
+                    del self.queues[guild_id]
+                return job
+        return None
+
+    def _dispatch(self):
+        """Start as many waiting jobs as the caps allow and wake every waiter."""
+        while self.running < self.max_concurrent:
+            job = self._next_job()
+            if job is None:
+                break
+            self.running += 1
+            self.running_by_language[job.language] = self.running_by_language.get(job.language, 0) + 1
+            job.started = True
+            job.wake.set()
+
+        # Positions may have changed for everyone still waiting
+        for users in self.queues.values():
+            for jobs in users.values():
+                for job in jobs:
+                    job.wake.set()
+
+    def _finish(self, job: Job):
+        self.running -= 1
+        self.running_by_language[job.language] -= 1
+        self._dispatch()
+
+    def _remove(self, guild_id: int, user_id: int, job: Job):
+        users = self.queues.get(guild_id)
+        if users is None or user_id not in users:
+            return
+        jobs = users[user_id]
+        try:
+            jobs.remove(job)
+        except ValueError:
+            return
+        if not jobs:
+            del users[user_id]
+        if not users:
+            del self.queues[guild_id]
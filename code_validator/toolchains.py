@@ -0,0 +1,74 @@
+import platform
+import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+# Seconds a toolchain may take to print its version while probing
+VERSION_TIMEOUT = 15
+
+# Executable and version arguments of the tool behind each externally validated language
+EXTERNAL_TOOLS: Dict[str, Tuple[str, List[str]]] = {
+    "javascript": ("node", ["--version"]),
+    "typescript": ("tsc", ["--version"]),
+    "java": ("javac", ["-version"]),
+    "c": ("gcc", ["--version"]),
+    "c++": ("g++", ["--version"]),
+    "c#": ("csc", ["-version"]),
+    "go": ("go", ["version"]),
+    "ruby": ("ruby", ["--version"]),
+    "php": ("php", ["--version"]),
+    "rust": ("rustc", ["--version"]),
+    "bash": ("bash", ["--version"]),
+    "swift": ("swift", ["--version"]),
+    "kotlin": ("kotlinc", ["-version"]),
+}
+# Languages checked inside the bot process
+BUILTIN_LANGUAGES = ("python", "html", "css", "sql")
+
+
+class Toolchain(NamedTuple):
+    """Where a language's validator was found and the version it reported."""
+
+    path: Optional[str]
+    version: Optional[str]
+
+    @property
+    def available(self) -> bool:
+        return self.path is not None
+
+
+# Languages checked inside the bot process need no probing
+BUILTIN_TOOLCHAINS = {
+    language: Toolchain("in-process", f"Python {platform.python_version()}" if language == "python" else "built-in")
+    for language in BUILTIN_LANGUAGES
+}
+
+
+def probe_tool(executable: str, version_args: List[str]) -> Toolchain:
+    """Resolve an executable on PATH and ask it for its version."""
+    path = shutil.which(executable)
+    if path is None:
+        return Toolchain(None, None)
+    try:
+        completed = subprocess.run(
+            [path, *version_args], stdin=subprocess.DEVNULL, capture_output=True, timeout=VERSION_TIMEOUT
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return Toolchain(path, "unknown")
+    # Some tools, javac 8 among them, print their version to stderr
+    lines = (completed.stdout or completed.stderr).decode(errors="replace").strip().splitlines()
+    return Toolchain(path, lines[0] if lines else "unknown")
+
+
+def probe_toolchains() -> Dict[str, Toolchain]:
+    """Build the capability table of every supported language.
+
+    The tools are asked for their version all at once, so this blocks for
+    as long as the slowest one takes to start. Run it in an executor.
+    """
+    with ThreadPoolExecutor(max_workers=len(EXTERNAL_TOOLS)) as pool:
+        probed = pool.map(lambda tool: probe_tool(*tool), EXTERNAL_TOOLS.values())
+        toolchains = dict(zip(EXTERNAL_TOOLS, probed))
+    toolchains.update(BUILTIN_TOOLCHAINS)
+    return toolchains